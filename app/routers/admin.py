@@ -0,0 +1,9 @@
+from fastapi import APIRouter
+from app.utils.affiliates import affiliate_registry
+
+router = APIRouter()
+
+@router.post("/admin/affiliates/refresh")
+async def refresh_affiliates():
+    counts = await affiliate_registry.refresh()
+    return {"status": "ok", "affiliates": counts}
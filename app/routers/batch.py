@@ -0,0 +1,27 @@
+from collections import Counter
+from typing import Any, List
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from app.services.batch_search import stream_batch, query_type, BATCH_MAX_QUERIES
+from app.utils.logger import log_supabase
+
+router = APIRouter()
+
+
+class BatchRequest(BaseModel):
+    # [{"type": "flight", "origin": "TLV", "destination": "MXP", "date": "2026-11-10", "id": "optional"}, ...]
+    queries: List[Any]
+
+
+@router.post("/search/batch")
+async def search_batch(request: Request, payload: BatchRequest):
+    if not payload.queries:
+        return {"error": "No queries given"}
+    if len(payload.queries) > BATCH_MAX_QUERIES:
+        return {"error": f"Too many queries, at most {BATCH_MAX_QUERIES} per batch"}
+
+    types = Counter(query_type(query) for query in payload.queries)
+    log_supabase("search_batch", {"queries": len(payload.queries), "types": dict(types)}, request)
+
+    return StreamingResponse(stream_batch(payload.queries), media_type="application/x-ndjson")
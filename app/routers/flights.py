@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Request
-from app.services.flightlook import search_flights
-from app.utils.logger import log_supabase, store_redirect
-from app.utils.supabase import get_affiliates_by_type_and_priority
-import logging
+from app.utils.responses import FastJSONResponse
+from app.services.trip_search import find_flights, find_flight_calendar
+from app.services.flight_calendar import parse_month, CALENDAR_MAX_MONTHS, CALENDAR_MAX_STAY
+from app.utils.logger import log_supabase
 
 router = APIRouter()
 
@@ -11,18 +11,35 @@ async def flights(request: Request, origin: str, destination: str, date: str, re
     query = {"origin": origin, "destination": destination, "date": date}
     log_supabase("search_flights", query, request)
 
-    affiliates = await get_affiliates_by_type_and_priority("flight")
-    logging.info(f"Found {len(affiliates)} affiliates for flights")
-    all_results = []
-    for affiliate in affiliates:
-        results = await search_flights(origin, destination, date, return_date, affiliate)
-        logging.info(f"Affiliate {affiliate['provider_name']} returned {len(results)} results")
-        if results:
-            for flight in results:
-                guid, safe_url = store_redirect(flight["affiliate_link"], "flight", flight)
-                flight["redirect_url"] = safe_url
-                flight["affiliate_provider"] = affiliate["provider_name"]
-            all_results.extend(results)
-            break
+    try:
+        all_results = await find_flights(origin, destination, date, return_date)
+    except ValueError as e:
+        return FastJSONResponse({"error": str(e)}, status_code=400)
+    return FastJSONResponse(all_results or {"error": "No results found from any affiliate"})
 
-    return all_results or {"error": "No results found from any affiliate"}
+
+@router.get("/search/flights/calendar")
+async def flights_calendar(request: Request, origin: str, destination: str, months: str,
+                           min_stay: int = 1, max_stay: int = 0, top: int = 5):
+    # months: "2026-11" or "2026-11,2026-12"; max_stay=0 searches one-way departures only
+    month_list = [month.strip() for month in months.split(",") if month.strip()]
+    try:
+        for month in month_list:
+            parse_month(month)
+    except ValueError:
+        return FastJSONResponse({"error": "Invalid months. Use YYYY-MM, comma separated."}, status_code=400)
+    if not month_list or len(month_list) > CALENDAR_MAX_MONTHS:
+        return FastJSONResponse({"error": f"Give between 1 and {CALENDAR_MAX_MONTHS} months."}, status_code=400)
+    # max_stay decides how many inbound months are fetched, so it is bounded like the months
+    if min_stay < 0 or not 0 <= max_stay <= CALENDAR_MAX_STAY or (max_stay and min_stay > max_stay):
+        return FastJSONResponse(
+            {"error": f"Stays must satisfy 0 <= min_stay <= max_stay <= {CALENDAR_MAX_STAY}."}, status_code=400
+        )
+
+    query = {"origin": origin, "destination": destination, "months": month_list, "min_stay": min_stay, "max_stay": max_stay}
+    log_supabase("search_flights_calendar", query, request)
+
+    calendar = await find_flight_calendar(origin, destination, month_list, min_stay, max_stay, max(1, min(top, 50)))
+    if not calendar["departures"]:
+        return {"error": "No results found from any affiliate"}
+    return FastJSONResponse(calendar)
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Request
-from app.services.hotellook import search_hotels
-from app.utils.logger import log_supabase, store_redirect
-from app.utils.supabase import get_affiliates_by_type_and_priority
+from app.utils.responses import FastJSONResponse
+from app.services.trip_search import find_hotels
+from app.utils.logger import log_supabase
 
 router = APIRouter()
 
@@ -18,17 +18,5 @@ async def hotels(request: Request, location: str, checkin: str, checkout: str, a
     }
     log_supabase("search_hotels", query, request)
 
-    affiliates = await get_affiliates_by_type_and_priority("hotel")
-    all_results = []
-
-    for affiliate in affiliates:
-        results = await search_hotels(location, checkin, checkout, adults, children, currency, limit)
-        if results:
-            for hotel in results:
-                guid, safe_url = store_redirect(hotel["affiliate_link"], "hotel", hotel)
-                hotel["redirect_url"] = safe_url
-                hotel["affiliate_provider"] = affiliate["provider_name"]
-            all_results.extend(results)
-            break
-
-    return all_results or {"error": "No results found from any affiliate"}
+    all_results = await find_hotels(location, checkin, checkout, adults, children, currency, limit)
+    return FastJSONResponse(all_results or {"error": "No results found from any affiliate"})
@@ -1,18 +1,46 @@
 from fastapi import APIRouter, Request, HTTPException
 from fastapi.responses import RedirectResponse
-from app.utils.logger import supabase, log_elk
+from app.utils.logger import log_elk
+from app.utils.redirect_cache import redirect_cache
+from app.utils.redirect_tokens import is_token, verify_redirect, register_click, InvalidToken
 from datetime import datetime
+import time
 
 router = APIRouter()
 
+def _redirect_signed(token: str, request: Request):
+    try:
+        payload = verify_redirect(token)
+    except InvalidToken:
+        raise HTTPException(status_code=404, detail="Invalid link")
+
+    if payload.get("e") and time.time() > payload["e"]:
+        raise HTTPException(status_code=410, detail="Link expired")
+
+    max_clicks = payload.get("m")
+    if max_clicks and not register_click(token, max_clicks):
+        raise HTTPException(status_code=410, detail="Click limit reached")
+
+    log_elk("redirects", {
+        "guid": token,
+        "type": payload.get("t"),
+        "ip": request.client.host,
+        "user_agent": request.headers.get("user-agent"),
+        "timestamp": datetime.utcnow().isoformat()
+    })
+
+    return RedirectResponse(payload["u"], status_code=302)
+
 @router.get("/r/{guid}")
 async def redirect_guid(guid: str, request: Request):
-    result = supabase.table("redirects").select("*").eq("guid", guid).execute()
+    if is_token(guid):
+        return _redirect_signed(guid, request)
+
+    redirect_data = await redirect_cache.get(guid)
 
-    if not result.data:
+    if not redirect_data:
         raise HTTPException(status_code=404, detail="Invalid link")
 
-    redirect_data = result.data[0]
     now = datetime.utcnow()
 
     # Check expiration
@@ -20,13 +48,13 @@ async def redirect_guid(guid: str, request: Request):
         raise HTTPException(status_code=410, detail="Link expired")
 
     # Check max clicks
-    clicks = redirect_data.get("clicks", 0)
+    clicks = redirect_data.get("clicks") or 0
     max_clicks = redirect_data.get("max_clicks")
     if max_clicks is not None and clicks >= max_clicks:
         raise HTTPException(status_code=410, detail="Click limit reached")
 
-    # Update clicks
-    supabase.table("redirects").update({"clicks": clicks + 1}).eq("guid", guid).execute()
+    # Count the click (flushed to the database in batches)
+    redirect_cache.record_click(guid, redirect_data)
 
     # Log event
     log_elk("redirects", {
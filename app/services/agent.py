@@ -3,8 +3,13 @@ import logging
 from app.utils.memory import get_user_preferences, save_user_preferences, log_interaction
 from app.utils.llm import extract_trip_info
 from app.utils.api_gateway import call_trip_api
+from app.utils.metrics import stage
 
 async def handle_user_request(data):
+    with stage("agent_total"):
+        return await _handle_user_request(data)
+
+async def _handle_user_request(data):
     try:
         user_id = data.get("user_id")
         message = data.get("message")
@@ -12,14 +17,17 @@ async def handle_user_request(data):
         logging.info(f"Handling request from user {user_id} in channel {channel}: {message}")
 
         # Step 1: Log input
-        await log_interaction(user_id, message, "input", channel)
+        with stage("log_input"):
+            await log_interaction(user_id, message, "input", channel)
 
         # Step 2: Load preferences
-        prefs = await get_user_preferences(user_id)
+        with stage("prefs"):
+            prefs = await get_user_preferences(user_id)
         logging.info(f"Loaded preferences for user {user_id}: {prefs}")
         logging.info(f"User {user_id} preferences: {prefs}")
         # Step 3: Extract trip intent from LLM
-        trip_info = await extract_trip_info(message, prefs)
+        with stage("extract"):
+            trip_info = await extract_trip_info(message, prefs)
         logging.info(f"Extracted trip info for user {user_id}: {trip_info}")
         # Step 4: If info missing, ask for more
         if not trip_info.get("complete"):
@@ -30,9 +38,8 @@ async def handle_user_request(data):
         # Step 5: Call relevant API (hotels, flights, cars)
         logging.info(f"DEBUG trip_info keys: {trip_info.keys()}")
         logging.info(f"DEBUG origin: {trip_info.get('origin')}")
-        results = await call_trip_api(trip_info)
-
-        results = await call_trip_api(trip_info)
+        with stage("search"):
+            results = await call_trip_api(trip_info)
 
         # ✅ Normalize flights/hotels to always be lists
         flights = results.get("flights", [])
@@ -50,11 +57,13 @@ async def handle_user_request(data):
             dates = {}
         # Step 6: Format response and log
         reply = results.get("formatted_reply", "Here are your trip details!")
-        await log_interaction(user_id, reply, "output")
+        with stage("log_output"):
+            await log_interaction(user_id, reply, "output")
 
         # Step 7: Save updated preferences if any
         if trip_info.get("updated_prefs"):
-            await save_user_preferences(user_id, trip_info["updated_prefs"])
+            with stage("save_prefs"):
+                await save_user_preferences(user_id, trip_info["updated_prefs"])
         logging.info(f"Reply: {reply}")
         logging.info(f"Flights: {flights}")
         logging.info(f"Hotels: {hotels}")
@@ -0,0 +1,123 @@
+import os
+import asyncio
+import logging
+from app.services.trip_search import find_flights, find_hotels, find_cars, find_insurance, find_esim, car_query, _norm
+from app.utils.provider_health import ProviderLimits
+from app.utils.metrics import stage
+from app.utils import fast_json
+
+# 📦 Batch search: many heterogeneous /search/* queries in one request.
+# Identical queries run once and answer every position that asked for them.
+# Searches run concurrently, at most BATCH_CONCURRENCY at a time and at most
+# BATCH_PROVIDER_CONCURRENCY upstream calls per provider; both limits are shared
+# by all batch requests, so a burst of batches cannot stampede an upstream.
+# Results are streamed as NDJSON lines in completion order, each tagged with the
+# query's index (and its "id", when the caller sent one).
+
+BATCH_MAX_QUERIES = int(os.getenv("BATCH_MAX_QUERIES", "100"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "16"))
+BATCH_PROVIDER_CONCURRENCY = int(os.getenv("BATCH_PROVIDER_CONCURRENCY", "4"))
+
+_slots = asyncio.Semaphore(BATCH_CONCURRENCY)
+_provider_limits = ProviderLimits(BATCH_PROVIDER_CONCURRENCY)
+
+
+def _find_cars(**params):
+    return find_cars(car_query(**params))
+
+
+# type -> (search, required params, optional params with defaults), as on the GET endpoints
+SEARCHES = {
+    "flight": (find_flights, ("origin", "destination", "date"), {"return_date": ""}),
+    "hotel": (find_hotels, ("location", "checkin", "checkout"), {"adults": 1, "children": 0, "currency": "USD", "limit": 10}),
+    "car": (_find_cars, ("pickup_iata", "dropoff_iata", "pickup_name"), {
+        "dropoff_name": "", "pickup_lat": 0.0, "pickup_lng": 0.0, "dropoff_lat": 0.0, "dropoff_lng": 0.0,
+        "date": "", "return_date": ""
+    }),
+    "insurance": (find_insurance, ("destination", "start", "end"), {}),
+    "esim": (find_esim, ("destination",), {}),
+}
+
+
+def _prepare(query):
+    """(type, params) for one query; ValueError when it can't be run."""
+    if not isinstance(query, dict):
+        raise ValueError("Each query must be an object")
+    kind = query.get("type")
+    if not isinstance(kind, str) or kind not in SEARCHES:
+        raise ValueError(f"Unknown type {kind!r}, expected one of: {', '.join(SEARCHES)}")
+    _, required, optional = SEARCHES[kind]
+    missing = [name for name in required if query.get(name) in (None, "")]
+    if missing:
+        raise ValueError(f"Missing {', '.join(missing)} for {kind} search")
+
+    params = {name: str(query[name]) for name in required}
+    for name, default in optional.items():
+        value = query.get(name, default)
+        try:
+            params[name] = type(default)(value) if value is not None else default
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid {name} for {kind} search")
+    return kind, params
+
+
+def _dedupe_key(kind, params):
+    return (kind,) + tuple((name, _norm(value) if isinstance(value, str) else value) for name, value in sorted(params.items()))
+
+
+def query_type(query):
+    """The query's "type" when it is a string, else None (it may be any JSON value)."""
+    kind = query.get("type") if isinstance(query, dict) else None
+    return kind if isinstance(kind, str) else None
+
+
+def _line(index, query, kind, **fields):
+    line = {"index": index}
+    if isinstance(query, dict) and query.get("id") is not None:
+        line["id"] = query["id"]
+    line["type"] = kind
+    line.update(fields)
+    return fast_json.dumps(line) + b"\n"
+
+
+async def _run(kind, params):
+    async with _slots:
+        with stage(f"batch_{kind}"):
+            return await SEARCHES[kind][0](**params)
+
+
+async def stream_batch(queries):
+    """Run the queries and yield one NDJSON line (bytes) per query as its search completes."""
+    jobs = {}  # dedupe key -> (type, params, [indexes])
+    for index, query in enumerate(queries):
+        try:
+            kind, params = _prepare(query)
+        except ValueError as e:
+            yield _line(index, query, query_type(query), error=str(e))
+            continue
+        jobs.setdefault(_dedupe_key(kind, params), (kind, params, []))[2].append(index)
+
+    # Tasks copy the context at creation, so every upstream call they make is bounded per provider
+    with _provider_limits.applied():
+        tasks = {asyncio.create_task(_run(kind, params)): (kind, indexes) for kind, params, indexes in jobs.values()}
+
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                kind, indexes = tasks[task]
+                if task.exception() is not None:
+                    logging.error(f"Batch {kind} search failed: {task.exception()}")
+                    fields = {"error": str(task.exception()) or type(task.exception()).__name__}
+                elif task.result():
+                    fields = {"results": task.result()}
+                else:
+                    fields = {"error": "No results found from any affiliate"}
+                for index in indexes:
+                    yield _line(index, queries[index], kind, **fields)
+    finally:
+        # Client went away (or the stream was closed): don't leave searches running
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,111 @@
+import os
+import asyncio
+import logging
+from app.utils.provider_health import CircuitOpen
+
+# 🌐 Affiliate fan-out policies:
+#   sequential - try affiliates in priority order, stop at the first non-empty result (legacy behaviour)
+#   race       - query all at once, first non-empty result wins
+#   hedged     - start the next affiliate when the current one is slow (hedge delay) or comes back empty
+#   gather     - query all at once and merge every non-empty result in priority order
+# Every affiliate call gets its own deadline; losing calls are cancelled.
+# The fan-out waits AFFILIATE_DEADLINE_GRACE longer than that deadline, so the
+# breaker's own timeout (never above the deadline) fires first and a hanging
+# provider is recorded as a failure instead of being cancelled unrecorded.
+
+FANOUT_POLICIES = ("sequential", "race", "hedged", "gather")
+AFFILIATE_FANOUT_POLICY = os.getenv("AFFILIATE_FANOUT_POLICY", "sequential").lower()
+AFFILIATE_DEADLINE = float(os.getenv("AFFILIATE_DEADLINE", "10.0"))
+AFFILIATE_HEDGE_DELAY = float(os.getenv("AFFILIATE_HEDGE_DELAY", "1.5"))
+AFFILIATE_DEADLINE_GRACE = float(os.getenv("AFFILIATE_DEADLINE_GRACE", "0.5"))
+
+
+def policy_for(kind):
+    policy = os.getenv(f"AFFILIATE_FANOUT_POLICY_{kind.upper()}", AFFILIATE_FANOUT_POLICY).lower()
+    if policy not in FANOUT_POLICIES:
+        logging.warning(f"Unknown fan-out policy '{policy}' for {kind}, using sequential")
+        return "sequential"
+    return policy
+
+
+def deadline_for(affiliate):
+    return float(affiliate.get("timeout_seconds") or AFFILIATE_DEADLINE)
+
+
+async def _call(search, affiliate):
+    name = affiliate.get("provider_name")
+    try:
+        return await asyncio.wait_for(search(affiliate), timeout=deadline_for(affiliate) + AFFILIATE_DEADLINE_GRACE) or []
+    except asyncio.TimeoutError:
+        logging.warning(f"Affiliate {name} timed out after {deadline_for(affiliate)}s")
+    except CircuitOpen:
+        logging.info(f"Affiliate {name} skipped, circuit open")
+    except Exception as e:
+        logging.error(f"Affiliate {name} failed: {e}")
+    return []
+
+
+async def _cancel(tasks):
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _sequential(affiliates, search):
+    for affiliate in affiliates:
+        results = await _call(search, affiliate)
+        if results:
+            return [(affiliate, results)]
+    return []
+
+
+async def _gather(affiliates, search):
+    all_results = await asyncio.gather(*(_call(search, affiliate) for affiliate in affiliates))
+    return [(affiliate, results) for affiliate, results in zip(affiliates, all_results) if results]
+
+
+async def _first_non_empty(affiliates, search, hedge_delay=None):
+    waiting = list(affiliates)
+    pending = {}
+
+    def launch():
+        affiliate = waiting.pop(0)
+        pending[asyncio.create_task(_call(search, affiliate))] = affiliate
+
+    if hedge_delay is None:
+        while waiting:
+            launch()
+    elif waiting:
+        launch()
+
+    try:
+        while pending:
+            timeout = hedge_delay if hedge_delay is not None and waiting else None
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                # Hedge: the current affiliates are slow, bring in the next one
+                launch()
+                continue
+            for task in done:
+                affiliate = pending.pop(task)
+                results = task.result()
+                if results:
+                    return [(affiliate, results)]
+            if hedge_delay is not None and waiting:
+                launch()
+        return []
+    finally:
+        await _cancel(list(pending))
+
+
+async def fan_out(kind, affiliates, search, policy=None):
+    """Run search(affiliate) -> list over affiliates; returns [(affiliate, results), ...]."""
+    policy = policy or policy_for(kind)
+    if policy == "gather":
+        return await _gather(affiliates, search)
+    if policy == "race":
+        return await _first_non_empty(affiliates, search)
+    if policy == "hedged":
+        return await _first_non_empty(affiliates, search, hedge_delay=AFFILIATE_HEDGE_DELAY)
+    return await _sequential(affiliates, search)
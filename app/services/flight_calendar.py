@@ -0,0 +1,84 @@
+from datetime import date, timedelta
+
+# 📅 Cheapest-day analysis for flexible-date flight searches.
+# Outbound and inbound one-way calendars become price vectors indexed by day;
+# round trips are the N×M matrix outbound[:, None] + inbound[None, :], with
+# combinations outside the [min_stay, max_stay] window masked to +inf before
+# the cheapest cells are picked. numpy is imported on first use (see cold start).
+
+
+CALENDAR_MAX_MONTHS = 12
+CALENDAR_MAX_STAY = 60
+
+
+def parse_month(value):
+    """'YYYY-MM' -> date of the first day; ValueError otherwise."""
+    year, month = value.split("-")
+    return date(int(year), int(month), 1)
+
+
+def _month_end(first):
+    return (first.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+
+
+def return_months(months, max_stay):
+    """Months the inbound leg can fall in when departing in `months` and staying up to max_stay days."""
+    needed = set()
+    for month in months:
+        day = parse_month(month)
+        last = _month_end(day) + timedelta(days=max_stay)
+        while day <= last:
+            needed.add(day.strftime("%Y-%m"))
+            day = _month_end(day) + timedelta(days=1)
+    return sorted(needed)
+
+
+def _vectors(offers):
+    # One (cheapest) offer per day, as parallel arrays of day ordinals and prices
+    import numpy as np
+
+    by_day = {}
+    for offer in offers:
+        day = date.fromisoformat(str(offer.departure_date)[:10]).toordinal()
+        if offer.price and (day not in by_day or offer.price < by_day[day].price):
+            by_day[day] = offer
+    days = sorted(by_day)
+    kept = [by_day[day] for day in days]
+    return np.array(days, dtype=np.int64), np.array([offer.price for offer in kept], dtype=np.float64), kept
+
+
+def _smallest(values, top):
+    # Indices of the `top` smallest finite values, cheapest first
+    import numpy as np
+
+    flat = values.ravel()
+    count = min(top, int(np.isfinite(flat).sum()))
+    if count <= 0:
+        return np.array([], dtype=np.int64)
+    picked = np.argpartition(flat, count - 1)[:count]
+    return picked[np.argsort(flat[picked], kind="stable")]
+
+
+def cheapest_departures(outbound, top=5):
+    _, prices, kept = _vectors(outbound)
+    return [kept[i] for i in _smallest(prices, top)]
+
+
+def cheapest_round_trips(outbound, inbound, min_stay=1, max_stay=14, top=5):
+    """[(outbound offer, inbound offer, stay days, total price)], cheapest first."""
+    import numpy as np
+
+    out_days, out_prices, out_kept = _vectors(outbound)
+    in_days, in_prices, in_kept = _vectors(inbound)
+    if not out_kept or not in_kept:
+        return []
+
+    stay = in_days[None, :] - out_days[:, None]
+    totals = out_prices[:, None] + in_prices[None, :]
+    totals = np.where((stay >= min_stay) & (stay <= max_stay), totals, np.inf)
+
+    columns = len(in_kept)
+    return [
+        (out_kept[i // columns], in_kept[i % columns], int(stay.flat[i]), float(totals.flat[i]))
+        for i in _smallest(totals, top)
+    ]
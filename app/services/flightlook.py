@@ -1,9 +1,14 @@
-import httpx
+import os
 from datetime import datetime
 import logging
+from app.utils.http_client import get_client
+from app.services.normalize import log_raw, parse_travelpayouts_v1, parse_travelpayouts_v2, parse_travelpayouts_calendar
 
-API_V1_URL = "https://api.travelpayouts.com/v1/prices/cheap"
-API_V2_URL = "https://api.travelpayouts.com/v2/prices/latest"
+# Overridable so benchmarks can point at a local stand-in
+TRAVELPAYOUTS_URL = os.getenv("TRAVELPAYOUTS_URL", "https://api.travelpayouts.com").rstrip("/")
+API_V1_URL = f"{TRAVELPAYOUTS_URL}/v1/prices/cheap"
+API_V2_URL = f"{TRAVELPAYOUTS_URL}/v2/prices/latest"
+API_CALENDAR_URL = f"{TRAVELPAYOUTS_URL}/v1/prices/calendar"
 
 def parse_date_flexibly(date_str):
     for fmt in ("%d%m%Y", "%Y-%m-%d"):
@@ -55,48 +60,42 @@ async def search_flights(origin, destination, date, return_date ="", affiliate =
             }
 
         # Call Travelpayouts API
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(url, params=params, headers=headers)
-            data = response.json()
+        response = await get_client(url).get(url, params=params, headers=headers, timeout=10.0)
+        response.raise_for_status()
+        log_raw("Flight API", response.content)
 
-        logging.info(f"Flight API raw response: {data}")
-        flights = []
-
-        # Parse v1 response
-        if "v1" in url:
-            prices_by_dest = data.get("data", {})
-            currency = data.get("currency", "USD")
-
-            for dest, offers in prices_by_dest.items():
-                for offer_id, flight in offers.items():
-                    flights.append({
-                        "price": flight.get("price", 0),
-                        "currency": currency,
-                        "origin": origin,
-                        "destination": dest,
-                        "departure_date": flight.get("departure_at"),
-                        "return_date": flight.get("return_at"),
-                        "airline": flight.get("airline"),
-                        "flight_number": flight.get("flight_number"),
-                        "affiliate_link": f"https://www.aviasales.com/search/{origin}0101{dest}0202"
-                    })
-
-        # Parse v2 response
+        if url == API_V1_URL:
+            flights = parse_travelpayouts_v1(response.content, origin)
         else:
-            currency = data.get("currency", "USD")
-            for flight in data.get("data", []):
-                flights.append({
-                    "price": flight.get("price", 0),
-                    "currency": currency,
-                    "origin": flight.get("origin"),
-                    "destination": flight.get("destination"),
-                    "departure_date": flight.get("depart_date"),
-                    "affiliate_link": flight.get("link", "")
-                })
+            flights = parse_travelpayouts_v2(response.content)
 
         logging.info(f"Found {len(flights)} flights for {origin} to {destination} on {date}")
         return flights
 
     except Exception as e:
+        # Re-raised so the provider health tracker sees upstream failures
         logging.error(f"Flight API error: {e}")
-        return []
+        raise
+
+
+# 📅 One-way cheapest price per departure day of one month (month: "YYYY-MM")
+async def search_flight_calendar(origin, destination, month, affiliate):
+    params = {
+        "origin": origin,
+        "destination": destination,
+        "depart_date": month,
+        "calendar_type": "departure_date",
+        "currency": "usd",
+        "token": affiliate["api_key"]
+    }
+    try:
+        response = await get_client(API_CALENDAR_URL).get(
+            API_CALENDAR_URL, params=params, headers={"X-Access-Token": affiliate["api_key"]}, timeout=10.0
+        )
+        response.raise_for_status()
+        log_raw("Flight calendar API", response.content)
+        return parse_travelpayouts_calendar(response.content, origin, destination)
+    except Exception as e:
+        # Re-raised so the provider health tracker sees upstream failures
+        logging.error(f"Flight calendar API error: {e}")
+        raise
@@ -1,6 +1,9 @@
-import httpx
+import os
+from app.utils.http_client import get_client
+from app.services.normalize import log_raw, parse_hotellook
 
-BASE_URL = "https://engine.hotellook.com/api/v2/cache.json"
+# Overridable so benchmarks can point at a local stand-in
+BASE_URL = os.getenv("HOTELLOOK_URL", "https://engine.hotellook.com").rstrip("/") + "/api/v2/cache.json"
 AFFILIATE_TEMPLATE = "https://www.hotellook.com/hotels/{hotel_id}?marker=615157&checkIn={checkin}&checkOut={checkout}&adults={adults}"
 
 async def search_hotels(location, checkin, checkout, adults, children, currency, limit):
@@ -16,10 +19,7 @@ async def search_hotels(location, checkin, checkout, adults, children, currency,
         "photos": 2
     }
 
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        response = await client.get(BASE_URL, params=params)
-        data = response.json()
-        for hotel in data:
-            hotel_id = hotel.get("hotelId")
-            hotel["affiliate_link"] = AFFILIATE_TEMPLATE.format(hotel_id=hotel_id, checkin=checkin, checkout=checkout, adults=adults)
-        return data
\ No newline at end of file
+    response = await get_client(BASE_URL).get(BASE_URL, params=params, timeout=10.0)
+    response.raise_for_status()
+    log_raw("Hotellook", response.content)
+    return parse_hotellook(response.content, AFFILIATE_TEMPLATE, checkin, checkout, adults)
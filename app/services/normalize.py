@@ -0,0 +1,132 @@
+import os
+import random
+import logging
+from dataclasses import dataclass
+from typing import Any, Optional
+from app.utils import fast_json
+
+# 🧾 Upstream payload -> compact result records.
+# Parsers take the raw response body, decode it once with fast_json and build
+# slotted records; the result cache holds these records, and trip_search turns
+# the winning ones into plain dicts when it attaches redirect links.
+# Raw payloads are only logged at DEBUG, or for a RAW_LOG_SAMPLE_RATE share of
+# calls at INFO, truncated to RAW_LOG_MAX_CHARS.
+
+RAW_LOG_SAMPLE_RATE = float(os.getenv("RAW_LOG_SAMPLE_RATE", "0"))
+RAW_LOG_MAX_CHARS = int(os.getenv("RAW_LOG_MAX_CHARS", "2000"))
+
+
+def log_raw(label, body):
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        level = logging.DEBUG
+    elif RAW_LOG_SAMPLE_RATE and random.random() < RAW_LOG_SAMPLE_RATE:
+        level = logging.INFO
+    else:
+        return
+    if isinstance(body, bytes):
+        body = body[:RAW_LOG_MAX_CHARS].decode("utf-8", errors="replace")
+    logging.log(level, f"{label} raw response: {body[:RAW_LOG_MAX_CHARS]}")
+
+
+class _Record:
+    __slots__ = ()
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+@dataclass(slots=True)
+class FlightOffer(_Record):
+    price: Any
+    currency: str
+    origin: Optional[str]
+    destination: Optional[str]
+    departure_date: Optional[str]
+    affiliate_link: str
+    return_date: Optional[str] = None
+    airline: Optional[str] = None
+    flight_number: Optional[int] = None
+
+
+@dataclass(slots=True)
+class CarOffer(_Record):
+    price: Any
+    currency: str
+    car_model: str
+    pickup_location: str
+    dropoff_location: str
+    affiliate_link: str
+    provider: Optional[str]
+
+
+def to_dicts(results):
+    return [item.to_dict() if hasattr(item, "to_dict") else item for item in results]
+
+
+# ✈️ Travelpayouts /v1/prices/cheap: {"currency", "data": {dest: {n: offer}}}
+def parse_travelpayouts_v1(body, origin):
+    data = fast_json.loads(body)
+    currency = data.get("currency", "USD")
+    flights = []
+    for dest, offers in (data.get("data") or {}).items():
+        link = f"https://www.aviasales.com/search/{origin}0101{dest}0202"
+        for flight in offers.values():
+            flights.append(FlightOffer(
+                flight.get("price", 0), currency, origin, dest, flight.get("departure_at"), link,
+                flight.get("return_at"), flight.get("airline"), flight.get("flight_number")
+            ))
+    return flights
+
+
+# ✈️ Travelpayouts /v2/prices/latest: {"currency", "data": [offer, ...]}
+def parse_travelpayouts_v2(body):
+    data = fast_json.loads(body)
+    currency = data.get("currency", "USD")
+    return [
+        FlightOffer(
+            flight.get("price", 0), currency, flight.get("origin"), flight.get("destination"),
+            flight.get("depart_date"), flight.get("link", "")
+        )
+        for flight in data.get("data") or []
+    ]
+
+
+# 📅 Travelpayouts /v1/prices/calendar: {"currency", "data": {"YYYY-MM-DD": offer}}, one cheapest offer per day
+def parse_travelpayouts_calendar(body, origin, destination):
+    data = fast_json.loads(body)
+    currency = data.get("currency", "USD")
+    flights = []
+    for day, flight in (data.get("data") or {}).items():
+        link = f"https://www.aviasales.com/search/{origin}{day[8:10]}{day[5:7]}{destination}1"
+        flights.append(FlightOffer(
+            flight.get("price", 0), currency, flight.get("origin", origin), flight.get("destination", destination),
+            flight.get("departure_at") or day, link, None, flight.get("airline"), flight.get("flight_number")
+        ))
+    return flights
+
+
+# 🚗 Sky-Scrapper searchCars: {"data": {"quotes": [...]}}, sometimes JSON-encoded twice
+def parse_sky_scrapper(body, provider):
+    data = fast_json.loads(body)
+    if isinstance(data, str):
+        data = fast_json.loads(data)
+    if not isinstance(data, dict):
+        raise ValueError(f"Unexpected data type: {type(data)}")
+    cars = []
+    for offer in (data.get("data") or {}).get("quotes", []):
+        location = offer.get("loc") or {}
+        cars.append(CarOffer(
+            offer.get("tot_price"), offer.get("currency", "EUR"), offer.get("sipp", "Unknown"),
+            location.get("pu", "PU"), location.get("do", "DO"), offer.get("deeplink", ""), provider
+        ))
+    return cars
+
+
+# 🏨 Hotellook cache.json: a list of hotels, passed through with an affiliate link added
+def parse_hotellook(body, link_template, checkin, checkout, adults):
+    hotels = fast_json.loads(body)
+    for hotel in hotels:
+        hotel["affiliate_link"] = link_template.format(
+            hotel_id=hotel.get("hotelId"), checkin=checkin, checkout=checkout, adults=adults
+        )
+    return hotels
@@ -1,14 +1,16 @@
-import httpx
+import os
 import logging
-import json
 from datetime import datetime, timedelta
+from app.utils.http_client import get_client
+from app.services.normalize import log_raw, parse_sky_scrapper
 
-SKY_SCRAPPER_API_URL = "https://sky-scrapper.p.rapidapi.com/api/v1/cars/searchCars"
+# Overridable so benchmarks can point at a local stand-in
+SKY_SCRAPPER_URL = os.getenv("SKY_SCRAPPER_URL", "https://sky-scrapper.p.rapidapi.com").rstrip("/")
+SKY_SCRAPPER_API_URL = f"{SKY_SCRAPPER_URL}/api/v1/cars/searchCars"
 
 async def search_cars(params: dict, affiliate: dict):
+    provider = affiliate.get("provider_name")
     try:
-        provider = affiliate.get("provider_name")
-
         if provider != "sky-scrapper":
             logging.warning(f"Unsupported provider: {provider}")
             return []
@@ -33,39 +35,12 @@ async def search_cars(params: dict, affiliate: dict):
         )
 
         logging.info(f"[Sky-Scrapper] Request: {url}")
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.get(url, headers=headers)
-            resp.raise_for_status()
-            logging.warning(f"[Sky-Scrapper] RAW resp.text (first 500 chars): {resp.text[:500]}")
-
-            try:
-                data = resp.json()
-            except Exception:
-                data = json.loads(resp.text)
-
-            # 🔁 Double-parse if data is still a string
-            if isinstance(data, str):
-                logging.info("[Sky-Scrapper] Double-parsing JSON response")
-                data = json.loads(data)
-
-        if not isinstance(data, dict):
-            raise ValueError(f"Unexpected data type: {type(data)}")
-
-        results = []
-        quotes = data.get("data", {}).get("quotes", [])
-        for offer in quotes:
-            results.append({
-                "price": offer.get("tot_price"),  # ✅ Just a float, no .get("amount")
-                "currency": offer.get("currency", "EUR"),
-                "car_model": offer.get("sipp", "Unknown"),  # or vendor name or vehicle type
-                "pickup_location": offer.get("loc", {}).get("pu", "PU"),
-                "dropoff_location": offer.get("loc", {}).get("do", "DO"),
-                "affiliate_link": offer.get("deeplink", ""),
-                "provider": provider
-            })
-
-        return results
+        resp = await get_client(url).get(url, headers=headers, timeout=10.0)
+        resp.raise_for_status()
+        log_raw("[Sky-Scrapper]", resp.content)
+        return parse_sky_scrapper(resp.content, provider)
 
     except Exception as e:
+        # Re-raised so the provider health tracker sees upstream failures
         logging.error(f"[search_cars] API error with provider {provider}: {e}")
-        return []
+        raise
@@ -0,0 +1,269 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from functools import partial
+from app.services.flightlook import search_flights, search_flight_calendar, parse_date_flexibly
+from app.services.flight_calendar import return_months, cheapest_departures, cheapest_round_trips
+from app.services.hotellook import search_hotels
+from app.services.searchcars import search_cars
+from app.services.insurance import search_insurance
+from app.services.fanout import fan_out, deadline_for, policy_for
+from app.services.normalize import to_dicts
+from app.utils.logger import store_redirect
+from app.utils.supabase import get_affiliates_by_type_and_priority
+from app.utils.result_cache import result_cache
+from app.utils.provider_health import provider_health
+from app.utils.metrics import stage
+
+# 🔎 Search orchestration shared by the /search/* routers and call_trip_api.
+# Each find_* fans out over the affiliates (see fanout.py for the policies),
+# attaches redirect links and returns a plain list ([] when nothing was found).
+
+
+def _norm(value):
+    return str(value or "").strip().lower()
+
+
+def _month(date):
+    # Travelpayouts prices are cached per month, so that is the flight key granularity
+    if not date:
+        return ""
+    try:
+        return parse_date_flexibly(date).strftime("%Y-%m")
+    except ValueError:
+        return _norm(date)
+
+
+def _guarded(affiliate, search, *args):
+    # Upstream call behind the provider's circuit breaker and adaptive timeout (cache hits bypass it)
+    return partial(provider_health.call, affiliate["provider_name"], partial(search, *args), deadline_for(affiliate))
+
+
+def _attach_redirects(results, content_type, provider_name):
+    for item in results:
+        guid, safe_url = store_redirect(item["affiliate_link"], content_type, item)
+        item["redirect_url"] = safe_url
+        item["affiliate_provider"] = provider_name
+
+
+def _collect(winners, content_type):
+    all_results = []
+    with stage("redirects"):
+        for affiliate, results in winners:
+            # Cached records are shared, the response gets its own dicts
+            results = to_dicts(results)
+            _attach_redirects(results, content_type, affiliate["provider_name"])
+            all_results.extend(results)
+    return all_results
+
+
+async def find_flights(origin, destination, date, return_date=""):
+    """Raises ValueError for an unrecognized date, before any upstream (and its breaker) is called."""
+    for value in (date, return_date):
+        if value:
+            parse_date_flexibly(value)
+    affiliates = await get_affiliates_by_type_and_priority("flight")
+    logging.info(f"Found {len(affiliates)} affiliates for flights")
+
+    async def search(affiliate):
+        key = ("flight", affiliate["provider_name"], _norm(origin), _norm(destination), _month(date), _month(return_date))
+        results = await result_cache.get_or_fetch(
+            "flight", key, _guarded(affiliate, search_flights, origin, destination, date, return_date, affiliate)
+        )
+        logging.info(f"Affiliate {affiliate['provider_name']} returned {len(results)} results")
+        return results
+
+    return _collect(await fan_out("flight", affiliates, search), "flight")
+
+
+async def find_hotels(location, checkin, checkout, adults=1, children=0, currency="USD", limit=10):
+    affiliates = await get_affiliates_by_type_and_priority("hotel")
+
+    async def search(affiliate):
+        key = ("hotel", affiliate["provider_name"], _norm(location), checkin, checkout, int(adults), int(children),
+               _norm(currency), int(limit))
+        return await result_cache.get_or_fetch(
+            "hotel", key, _guarded(affiliate, search_hotels, location, checkin, checkout, adults, children, currency, limit)
+        )
+
+    return _collect(await fan_out("hotel", affiliates, search), "hotel")
+
+
+def car_query(pickup_iata, dropoff_iata, pickup_name, dropoff_name="", pickup_lat=0.0, pickup_lng=0.0,
+              dropoff_lat=0.0, dropoff_lng=0.0, date="", return_date=""):
+    """The find_cars query with dropoff defaulting to pickup and return to pickup +5 days.
+    Raises ValueError for a date that is not YYYY-MM-DD."""
+    if not return_date and date:
+        return_date = (datetime.strptime(date, "%Y-%m-%d") + timedelta(days=5)).strftime("%Y-%m-%d")
+    return {
+        "pickup_iata": pickup_iata,
+        "dropoff_iata": dropoff_iata,
+        "pickup_name": pickup_name,
+        "dropoff_name": dropoff_name or pickup_name,
+        "pickup_lat": pickup_lat,
+        "pickup_lng": pickup_lng,
+        "dropoff_lat": dropoff_lat or pickup_lat,
+        "dropoff_lng": dropoff_lng or pickup_lng,
+        "date": date,
+        "return_date": return_date
+    }
+
+
+async def find_cars(query):
+    """Raises ValueError for a date that is not YYYY-MM-DD, before any upstream (and its breaker) is called."""
+    for field in ("date", "return_date"):
+        if query.get(field):
+            datetime.strptime(query[field], "%Y-%m-%d")
+    affiliates = await get_affiliates_by_type_and_priority("car")
+    logging.info(f"Found {len(affiliates)} affiliates for car rentals")
+
+    async def search(affiliate):
+        key = ("car", affiliate["provider_name"], _norm(query.get("pickup_iata")), _norm(query.get("dropoff_iata")),
+               query.get("date"), query.get("return_date"))
+        results = await result_cache.get_or_fetch("car", key, _guarded(affiliate, search_cars, query, affiliate))
+        logging.info(f"Affiliate {affiliate['provider_name']} returned {len(results)} results")
+        logging.debug("Results from %s: %s", affiliate["provider_name"], results)
+        return results
+
+    return _collect(await fan_out("car", affiliates, search), "car")
+
+
+async def find_insurance(destination, start, end):
+    affiliates = await get_affiliates_by_type_and_priority("insurance")
+
+    async def search(affiliate):
+        return await search_insurance(destination, start, end, affiliate)
+
+    return _collect(await fan_out("insurance", affiliates, search), "insurance")
+
+
+async def find_esim(destination):
+    """The top eSIM affiliate's country page as a redirect, or None without an affiliate."""
+    affiliates = await get_affiliates_by_type_and_priority("esim")
+    if not affiliates:
+        return None
+
+    affiliate = affiliates[0]
+    base_url = affiliate["template_url"]  # Example: https://www.airalo.com/?irclickid=xxxx&utm...
+
+    # Format: https://www.airalo.com/france-esim?irclickid=...
+    country_slug = destination.lower().replace(" ", "-")
+    full_url = base_url.replace("https://www.airalo.com", f"https://www.airalo.com/{country_slug}-esim")
+
+    guid, safe_url = store_redirect(full_url, "esim", {"country": destination})
+
+    return {
+        "country": destination,
+        "affiliate_provider": affiliate["provider_name"],
+        "redirect_url": safe_url
+    }
+
+
+async def find_flight_calendar(origin, destination, months, min_stay=0, max_stay=0, top=5):
+    """Cheapest departure days over `months` ("YYYY-MM") and, when max_stay is set, the
+    cheapest round trips staying min_stay..max_stay days. Each route and month is one
+    cached upstream call per affiliate, fanned out under the flight policy; all of them
+    run concurrently and every result keeps the provider that returned it."""
+    affiliates = [a for a in await get_affiliates_by_type_and_priority("flight") if a.get("provider_url") != "v2"]
+    provider_of = {}  # id(offer) -> provider name, for offers returned by winning affiliates
+
+    async def leg(frm, to, month):
+        async def search(affiliate):
+            key = ("calendar", affiliate["provider_name"], _norm(frm), _norm(to), month)
+            return await result_cache.get_or_fetch(
+                "calendar", key, _guarded(affiliate, search_flight_calendar, frm, to, month, affiliate)
+            )
+
+        offers = []
+        for affiliate, results in await fan_out("calendar", affiliates, search, policy_for("flight")):
+            for offer in results:
+                provider_of[id(offer)] = affiliate["provider_name"]
+            offers.extend(results)
+        return offers
+
+    inbound_months = return_months(months, max_stay) if max_stay else []
+    legs = await asyncio.gather(
+        *(leg(origin, destination, month) for month in months),
+        *(leg(destination, origin, month) for month in inbound_months)
+    )
+    outbound = [offer for offers in legs[:len(months)] for offer in offers]
+    inbound = [offer for offers in legs[len(months):] for offer in offers]
+
+    with stage("calendar_analysis"):
+        departures = []
+        for offer in cheapest_departures(outbound, top):
+            item = offer.to_dict()
+            _attach_redirects([item], "flight", provider_of[id(offer)])
+            departures.append(item)
+
+        round_trips = []
+        if max_stay:
+            for out, back, stay, price in cheapest_round_trips(outbound, inbound, min_stay, max_stay, top):
+                depart_day, return_day = str(out.departure_date)[:10], str(back.departure_date)[:10]
+                item = {
+                    "price": price,
+                    "currency": out.currency,
+                    "origin": out.origin,
+                    "destination": out.destination,
+                    "departure_date": out.departure_date,
+                    "return_date": back.departure_date,
+                    "stay_days": stay,
+                    "outbound": out.to_dict(),
+                    "inbound": back.to_dict(),
+                    "affiliate_link": (f"https://www.aviasales.com/search/{origin}{depart_day[8:10]}{depart_day[5:7]}"
+                                       f"{destination}{return_day[8:10]}{return_day[5:7]}1")
+                }
+                # The booking link covers both legs; it goes through the outbound's provider
+                _attach_redirects([item], "flight", provider_of[id(out)])
+                round_trips.append(item)
+
+    return {
+        "origin": origin,
+        "destination": destination,
+        "months": months,
+        "departures": departures,
+        "round_trips": round_trips
+    }
+
+
+async def _safe(label, coro):
+    try:
+        with stage(f"search_{label}"):
+            return await coro
+    except Exception as e:
+        logging.error(f"{label} search failed: {e}")
+        return []
+
+
+async def search_trip(info):
+    """Run every search the trip info allows concurrently, in-process."""
+    origin = info.get("origin")
+    destination = info.get("destination")
+    dates = info.get("dates") or {}
+    depart_date = dates.get("start")
+    return_date = dates.get("end")
+    adults = info.get("adults", 1)
+    children = info.get("children", 0)
+    types = info.get("type") or []
+
+    jobs = {}
+    if origin and destination and depart_date:
+        jobs["flights"] = find_flights(origin, destination, depart_date, return_date or "")
+    if destination and depart_date and return_date:
+        jobs["hotels"] = find_hotels(destination, depart_date, return_date, adults, children, "EUR", 5)
+    if "car" in types and destination and depart_date:
+        jobs["cars"] = find_cars({
+            "pickup_iata": destination,
+            "dropoff_iata": destination,
+            "pickup_name": destination,
+            "dropoff_name": destination,
+            "date": depart_date,
+            "return_date": return_date or ""
+        })
+    if "insurance" in types and destination and depart_date and return_date:
+        jobs["insurance"] = find_insurance(destination, depart_date, return_date)
+
+    results = await asyncio.gather(*(_safe(name, job) for name, job in jobs.items()))
+    found = {"flights": [], "hotels": []}
+    found.update(zip(jobs.keys(), results))
+    return found
@@ -0,0 +1,89 @@
+import os
+import time
+import asyncio
+import logging
+
+# 🗂️ In-memory registry of affiliate_templates, grouped by type and sorted by priority.
+# Loaded once (all types in one query), refreshed in the background every
+# AFFILIATE_CACHE_TTL seconds and on demand through POST /admin/affiliates/refresh.
+
+AFFILIATE_CACHE_TTL = float(os.getenv("AFFILIATE_CACHE_TTL", "300"))
+
+
+class AffiliateRegistry:
+    def __init__(self, ttl=AFFILIATE_CACHE_TTL):
+        self.ttl = ttl
+        self.stats = {"lookups": 0, "loads": 0, "load_errors": 0}
+        self._by_type = None
+        self._loaded_at = 0.0
+        self._loader = None
+        self._refreshing = None
+        self._task = None
+
+    def register_loader(self, loader):
+        # loader() -> list of affiliate rows; a coroutine function
+        self._loader = loader
+
+    async def get(self, affiliate_type):
+        self.stats["lookups"] += 1
+        if self._by_type is None:
+            await self.refresh()
+        elif time.monotonic() - self._loaded_at > self.ttl:
+            # Serve the current copy and refresh behind it
+            self._schedule_refresh()
+        return list((self._by_type or {}).get(affiliate_type, []))
+
+    def _schedule_refresh(self):
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.create_task(self._load())
+        return self._refreshing
+
+    async def refresh(self):
+        return await asyncio.shield(self._schedule_refresh())
+
+    async def _load(self):
+        try:
+            rows = await self._loader()
+        except Exception as e:
+            self.stats["load_errors"] += 1
+            print(f"Error fetching affiliates: {e}")
+            if self._by_type is None:
+                self._by_type = {}
+            return self.counts()
+
+        by_type = {}
+        for row in sorted(rows or [], key=lambda r: r.get("priority") or 0):
+            by_type.setdefault(row.get("type"), []).append(row)
+        self._by_type = by_type
+        self._loaded_at = time.monotonic()
+        self.stats["loads"] += 1
+        logging.info(f"Loaded affiliates: {self.counts()}")
+        return self.counts()
+
+    def counts(self):
+        return {affiliate_type: len(rows) for affiliate_type, rows in (self._by_type or {}).items()}
+
+    async def start(self):
+        await self.refresh()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.ttl)
+            await self.refresh()
+
+    def snapshot(self):
+        return {**self.stats, "types": self.counts()}
+
+
+affiliate_registry = AffiliateRegistry()
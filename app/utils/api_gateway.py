@@ -1,8 +1,29 @@
 import os
-import httpx
+import asyncio
 import logging
+from app.utils.http_client import get_client
+from app.services.trip_search import search_trip
+from app.utils.provider_health import provider_health
 
-async def call_trip_api(info):
+# "inprocess" (default) calls the search services directly and concurrently.
+# "http" keeps the loopback through BASE_DOMAIN for split deployments.
+TRIP_SEARCH_MODE = os.getenv("TRIP_SEARCH_MODE", "inprocess").lower()
+
+
+async def _get_json_list(client, url, params, headers, label):
+    async def fetch():
+        resp = await client.get(url, params=params, headers=headers, timeout=15.0)
+        resp.raise_for_status()
+        return resp.json()
+
+    try:
+        return await provider_health.call(f"trip_api:{label.lower()}", fetch, 15.0)
+    except Exception as e:
+        logging.error(f"{label} search failed: {e}")
+        return []
+
+
+async def _search_over_http(info):
     origin = info.get("origin")
     destination = info.get("destination")
     dates = info.get("dates", {})
@@ -12,46 +33,61 @@ async def call_trip_api(info):
     children = info.get("children", 0)
 
     base_url = os.getenv("BASE_DOMAIN", "https://yourdomain.com")
-    
+
     headers = {
         "Authorization": f"Bearer {os.getenv('API_KEY', 'your_api_key')}",
         "Content-Type": "application/json"
     }
 
-    flight_results = []
-    hotel_results = []
-
-    async with httpx.AsyncClient(timeout=15.0) as client:
-        # Call /search/flights
-        if origin and destination and depart_date:
-            flight_params = {
-                "origin": origin,
-                "destination": destination,
-                "date": depart_date,
-                "return_date": return_date or ""
-            }
-            try:
-                flight_resp = await client.get(f"{base_url}/search/flights", params=flight_params, headers=headers)
-                flight_results = flight_resp.json() if flight_resp.status_code == 200 else []
-            except Exception as e:
-                logging.error(f"Flight search failed: {e}")
-
-        # Call /search/hotels
-        if destination and depart_date and return_date:
-            hotel_params = {
-                "location": destination,
-                "checkin": depart_date,
-                "checkout": return_date,
-                "adults": adults,
-                "children": children,
-                "currency": "EUR",
-                "limit": 5
-            }
-            try:
-                hotel_resp = await client.get(f"{base_url}/search/hotels", params=hotel_params, headers=headers)
-                hotel_results = hotel_resp.json() if hotel_resp.status_code == 200 else []
-            except Exception as e:
-                logging.error(f"Hotel search failed: {e}")
+    client = get_client(base_url)
+    jobs = {}
+
+    # Call /search/flights
+    if origin and destination and depart_date:
+        flight_params = {
+            "origin": origin,
+            "destination": destination,
+            "date": depart_date,
+            "return_date": return_date or ""
+        }
+        jobs["flights"] = _get_json_list(client, f"{base_url}/search/flights", flight_params, headers, "Flight")
+
+    # Call /search/hotels
+    if destination and depart_date and return_date:
+        hotel_params = {
+            "location": destination,
+            "checkin": depart_date,
+            "checkout": return_date,
+            "adults": adults,
+            "children": children,
+            "currency": "EUR",
+            "limit": 5
+        }
+        jobs["hotels"] = _get_json_list(client, f"{base_url}/search/hotels", hotel_params, headers, "Hotel")
+
+    results = await asyncio.gather(*jobs.values())
+    found = {"flights": [], "hotels": []}
+    found.update(zip(jobs.keys(), results))
+    return found
+
+
+def search_signature(info):
+    # The fields that decide which searches run and with what parameters
+    dates = info.get("dates") or {}
+    return (
+        info.get("origin"), info.get("destination"), dates.get("start"), dates.get("end"),
+        info.get("adults", 1), info.get("children", 0), tuple(sorted(info.get("type") or []))
+    )
+
+
+async def call_trip_api(info):
+    if TRIP_SEARCH_MODE == "http":
+        found = await _search_over_http(info)
+    else:
+        found = await search_trip(info)
+
+    flight_results = found.get("flights", [])
+    hotel_results = found.get("hotels", [])
 
     # Format a response
     if not flight_results and not hotel_results:
@@ -87,7 +123,9 @@ async def call_trip_api(info):
     return {
         "formatted_reply": formatted_reply,
         "flights": flight_results,
-        "hotels": hotel_results
+        "hotels": hotel_results,
+        "cars": found.get("cars", []),
+        "insurance": found.get("insurance", [])
     }
 
 
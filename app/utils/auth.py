@@ -2,6 +2,7 @@ from fastapi import Request, HTTPException
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import Response
 import os
+from app.utils.tracing import span
 
 class AuthMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
@@ -16,12 +17,13 @@ class AuthMiddleware(BaseHTTPMiddleware):
             return await call_next(request)
 
         # 🔐 Check Bearer Auth
-        auth_header = request.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            raise HTTPException(status_code=401, detail="Unauthorized")
+        with span("auth"):
+            auth_header = request.headers.get("Authorization")
+            if not auth_header or not auth_header.startswith("Bearer "):
+                raise HTTPException(status_code=401, detail="Unauthorized")
 
-        token = auth_header.split(" ")[1]
-        if token != os.getenv("API_KEY"):
-            raise HTTPException(status_code=403, detail="Forbidden")
+            token = auth_header.split(" ")[1]
+            if token != os.getenv("API_KEY"):
+                raise HTTPException(status_code=403, detail="Forbidden")
 
         return await call_next(request)
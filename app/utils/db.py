@@ -0,0 +1,222 @@
+import os
+import copy
+import time
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import httpx
+from dotenv import load_dotenv
+from app.utils.tracing import span
+
+# 🗄️ Single data-access layer for Supabase.
+# One async, pooled PostgREST client (created in the app lifespan) replaces the
+# per-module synchronous supabase clients, so database I/O never blocks the event loop.
+# Every query is timed per operation ("select:redirects", "rpc:increment_redirect_clicks", ...)
+# and reported under "db" in GET /status.
+#
+# DB_BACKEND=memory swaps in an in-process fake with the same interface, used by
+# benchmarks and local runs without a Supabase project.
+
+load_dotenv()
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+DB_BACKEND = os.getenv("DB_BACKEND", "supabase").lower()
+DB_TIMEOUT = float(os.getenv("DB_TIMEOUT", "5.0"))
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "20"))
+DB_SLOW_QUERY_SECONDS = float(os.getenv("DB_SLOW_QUERY_SECONDS", "0.5"))
+
+Row = Dict[str, Any]
+Filters = Dict[str, Any]
+Order = Tuple[str, bool]  # (column, descending)
+
+
+class PostgrestBackend:
+    """Async PostgREST client over one pooled httpx connection pool."""
+
+    def __init__(self, url, key, timeout=DB_TIMEOUT, max_connections=DB_MAX_CONNECTIONS):
+        headers = {
+            "apikey": key or "",
+            "Authorization": f"Bearer {key or ''}",
+            "Content-Type": "application/json",
+        }
+        self._client = httpx.AsyncClient(
+            base_url=f"{(url or '').rstrip('/')}/rest/v1",
+            headers=headers,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    @staticmethod
+    def _params(filters: Optional[Filters]):
+        return {column: f"eq.{value}" for column, value in (filters or {}).items()}
+
+    async def select(self, table: str, filters: Optional[Filters] = None, columns: str = "*",
+                     order: Optional[Order] = None, limit: Optional[int] = None) -> List[Row]:
+        params = {"select": columns, **self._params(filters)}
+        if order:
+            params["order"] = f"{order[0]}.{'desc' if order[1] else 'asc'}"
+        if limit:
+            params["limit"] = str(limit)
+        response = await self._client.get(f"/{table}", params=params)
+        response.raise_for_status()
+        return response.json()
+
+    async def insert(self, table: str, rows: Sequence[Row]) -> None:
+        response = await self._client.post(f"/{table}", json=list(rows), headers={"Prefer": "return=minimal"})
+        response.raise_for_status()
+
+    async def update(self, table: str, values: Row, filters: Filters) -> None:
+        response = await self._client.patch(
+            f"/{table}", params=self._params(filters), json=values, headers={"Prefer": "return=minimal"}
+        )
+        response.raise_for_status()
+
+    async def rpc(self, function: str, params: Row) -> Any:
+        response = await self._client.post(f"/rpc/{function}", json=params)
+        response.raise_for_status()
+        return response.json() if response.content else None
+
+    async def close(self):
+        await self._client.aclose()
+
+
+class MemoryBackend:
+    """In-process fake of the tables and RPCs the app uses, for tests and benchmarks."""
+
+    def __init__(self, tables: Optional[Dict[str, List[Row]]] = None):
+        self.tables = {name: [dict(row) for row in rows] for name, rows in (tables or {}).items()}
+
+    @staticmethod
+    def _matches(row: Row, filters: Optional[Filters]) -> bool:
+        return all(str(row.get(column)) == str(value) for column, value in (filters or {}).items())
+
+    async def select(self, table, filters=None, columns="*", order=None, limit=None):
+        rows = [row for row in self.tables.get(table, []) if self._matches(row, filters)]
+        if order:
+            rows.sort(key=lambda row: (row.get(order[0]) is None, row.get(order[0])), reverse=order[1])
+        if limit:
+            rows = rows[:limit]
+        if columns != "*":
+            wanted = [column.strip() for column in columns.split(",")]
+            rows = [{column: row.get(column) for column in wanted} for row in rows]
+        return copy.deepcopy(rows)
+
+    async def insert(self, table, rows):
+        self.tables.setdefault(table, []).extend(copy.deepcopy(list(rows)))
+
+    async def update(self, table, values, filters):
+        for row in self.tables.get(table, []):
+            if self._matches(row, filters):
+                row.update(copy.deepcopy(values))
+
+    async def rpc(self, function, params):
+        if function == "increment_redirect_clicks":
+            deltas = dict(zip(params["p_guids"], params["p_deltas"]))
+            for row in self.tables.get("redirects", []):
+                if row.get("guid") in deltas:
+                    row["clicks"] = (row.get("clicks") or 0) + deltas[row["guid"]]
+            return None
+        raise ValueError(f"Unknown RPC: {function}")
+
+    async def close(self):
+        pass
+
+
+class Database:
+    def __init__(self):
+        self.backend = None
+        self.stats = {}  # operation -> {"count", "errors", "total_ms", "max_ms"}
+
+    def _ensure_backend(self):
+        if self.backend is None:
+            if DB_BACKEND == "memory":
+                self.backend = MemoryBackend()
+            else:
+                self.backend = PostgrestBackend(SUPABASE_URL, SUPABASE_KEY)
+            logging.info(f"Database backend: {type(self.backend).__name__}")
+        return self.backend
+
+    async def start(self, backend=None):
+        """Create the backend in the app lifespan; tests and benchmarks can inject one."""
+        if backend is not None:
+            self.backend = backend
+        self._ensure_backend()
+
+    async def stop(self):
+        if self.backend is not None:
+            await self.backend.close()
+            self.backend = None
+
+    async def _timed(self, operation: str, method: str, *args, **kwargs):
+        # Created lazily when used outside the lifespan (scripts, one-off jobs)
+        backend = self._ensure_backend()
+        started = time.perf_counter()
+        ok = False
+        try:
+            with span(f"db {operation}"):
+                result = await getattr(backend, method)(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            elapsed = time.perf_counter() - started
+            stat = self.stats.get(operation)
+            if stat is None:
+                stat = self.stats[operation] = {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0}
+            stat["count"] += 1
+            stat["errors"] += not ok
+            stat["total_ms"] += elapsed * 1000
+            stat["max_ms"] = max(stat["max_ms"], elapsed * 1000)
+            if elapsed >= DB_SLOW_QUERY_SECONDS:
+                logging.warning(f"[DB] Slow query {operation}: {elapsed * 1000:.0f} ms")
+
+    # Generic access (write-behind bulk inserts)
+    async def insert(self, table: str, rows: Sequence[Row]) -> None:
+        if rows:
+            await self._timed(f"insert:{table}", "insert", table, rows)
+
+    # Redirects
+    async def get_redirect(self, guid: str) -> Optional[Row]:
+        rows = await self._timed("select:redirects", "select", "redirects", {"guid": guid}, limit=1)
+        return rows[0] if rows else None
+
+    async def insert_redirects(self, rows: Sequence[Row]) -> None:
+        await self._timed("insert:redirects", "insert", "redirects", rows)
+
+    async def increment_redirect_clicks(self, guids: List[str], deltas: List[int]) -> None:
+        await self._timed(
+            "rpc:increment_redirect_clicks", "rpc", "increment_redirect_clicks", {"p_guids": guids, "p_deltas": deltas}
+        )
+
+    # Search logs
+    async def insert_search_logs(self, rows: Sequence[Row]) -> None:
+        await self._timed("insert:search_logs", "insert", "search_logs", rows)
+
+    # User preferences
+    async def get_user_prefs(self, user_id: int) -> Row:
+        rows = await self._timed("select:user_preferences", "select", "user_preferences",
+                                 {"user_id": user_id}, columns="prefs", limit=1)
+        return (rows[0].get("prefs") or {}) if rows else {}
+
+    async def save_user_prefs(self, user_id: int, prefs: Row) -> None:
+        await self._timed("update:user_preferences", "update", "user_preferences", {"prefs": prefs}, {"user_id": user_id})
+
+    # Affiliates
+    async def list_affiliates(self) -> List[Row]:
+        return await self._timed("select:affiliate_templates", "select", "affiliate_templates", order=("priority", False))
+
+    def snapshot(self):
+        return {
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "queries": {
+                operation: {
+                    "count": stat["count"],
+                    "errors": stat["errors"],
+                    "avg_ms": round(stat["total_ms"] / stat["count"], 2) if stat["count"] else 0.0,
+                    "max_ms": round(stat["max_ms"], 2),
+                }
+                for operation, stat in self.stats.items()
+            },
+        }
+
+
+db = Database()
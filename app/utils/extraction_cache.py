@@ -0,0 +1,110 @@
+import os
+import re
+import copy
+import json
+import time
+import asyncio
+import logging
+from datetime import date
+from collections import OrderedDict
+
+# 🧠 Memoized LLM trip extraction.
+# Key = normalized message + the prefs fields the prompt depends on + today's date
+# (relative phrases like "next weekend" change meaning from one day to the next).
+# Bounded LRU with a TTL; concurrent identical requests (e.g. webhook retries)
+# share one LLM call. Optionally persisted to EXTRACTION_CACHE_PATH across restarts.
+
+EXTRACTION_CACHE_SIZE = int(os.getenv("EXTRACTION_CACHE_SIZE", "5000"))
+EXTRACTION_CACHE_TTL = float(os.getenv("EXTRACTION_CACHE_TTL", "21600"))
+EXTRACTION_CACHE_PATH = os.getenv("EXTRACTION_CACHE_PATH", "")
+EXTRACTION_PREF_FIELDS = ("home_city", "adults", "children", "currency", "budget", "travel_class")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize_message(message):
+    return _WHITESPACE.sub(" ", str(message or "")).strip().strip(".!?").lower()
+
+
+class ExtractionCache:
+    def __init__(self, max_size=EXTRACTION_CACHE_SIZE, ttl=EXTRACTION_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0}
+        self._entries = OrderedDict()  # key -> (value, expires_at wall-clock)
+        self._inflight = {}
+
+    def make_key(self, variant, message, prefs):
+        prefs = prefs or {}
+        relevant = {field: prefs.get(field) for field in EXTRACTION_PREF_FIELDS if prefs.get(field) is not None}
+        return json.dumps(
+            [variant, _normalize_message(message), relevant, date.today().isoformat()],
+            ensure_ascii=False, sort_keys=True, default=str
+        )
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry[1] < time.time():
+            if entry is not None:
+                del self._entries[key]
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return copy.deepcopy(entry[0])
+
+    def put(self, key, value):
+        self._entries[key] = (copy.deepcopy(value), time.time() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def get_or_compute(self, key, compute):
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        task = self._inflight.get(key)
+        if task is None:
+            async def run():
+                try:
+                    value = await compute()
+                    self.put(key, value)
+                    return value
+                finally:
+                    self._inflight.pop(key, None)
+            task = self._inflight[key] = asyncio.create_task(run())
+        else:
+            self.stats["coalesced"] += 1
+        return copy.deepcopy(await asyncio.shield(task))
+
+    def load(self, path=EXTRACTION_CACHE_PATH):
+        if not path or not os.path.exists(path):
+            return
+        try:
+            with open(path, encoding="utf-8") as f:
+                entries = json.load(f)
+            now = time.time()
+            for key, value, expires_at in entries:
+                if expires_at > now:
+                    self._entries[key] = (value, expires_at)
+            logging.info(f"Loaded {len(self._entries)} cached trip extractions from {path}")
+        except Exception as e:
+            logging.error(f"Failed to load extraction cache from {path}: {e}")
+
+    def save(self, path=EXTRACTION_CACHE_PATH):
+        if not path:
+            return
+        try:
+            entries = [[key, value, expires_at] for key, (value, expires_at) in self._entries.items()]
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logging.error(f"Failed to save extraction cache to {path}: {e}")
+
+    def snapshot(self):
+        return {**self.stats, "size": len(self._entries)}
+
+
+extraction_cache = ExtractionCache()
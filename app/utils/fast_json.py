@@ -0,0 +1,34 @@
+import json
+from datetime import date, datetime
+
+# ⚡ JSON through orjson when it is installed, the stdlib otherwise.
+# loads() takes bytes or str, so response bodies are decoded without building
+# an intermediate text copy; dumps() returns compact UTF-8 bytes ready to send.
+# Result records (app/services/normalize.py) serialize directly, without a dict pass.
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _default(value):
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(data) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
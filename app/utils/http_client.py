@@ -0,0 +1,70 @@
+import os
+import logging
+from urllib.parse import urlsplit
+import httpx
+from app.utils.tracing import TracingTransport
+
+# 🔌 One pooled AsyncClient per upstream origin (scheme://host:port).
+# Clients are created in the app lifespan (main.py) and closed on shutdown;
+# get_client() lazily creates one if called outside the lifespan (scripts, tests).
+
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10.0"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30.0"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "false").lower() in ("1", "true", "yes")
+
+_clients = {}
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _http2_supported() -> bool:
+    if not HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        logging.warning("HTTP2_ENABLED is set but the 'h2' package is missing, falling back to HTTP/1.1")
+        return False
+
+
+def _build_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+    # Pool settings live on the inner transport; the wrapper adds tracing spans and traceparent
+    transport = httpx.AsyncHTTPTransport(limits=limits, http2=_http2_supported())
+    return httpx.AsyncClient(timeout=HTTP_TIMEOUT, transport=TracingTransport(transport))
+
+
+def get_client(url: str) -> httpx.AsyncClient:
+    origin = _origin(url)
+    client = _clients.get(origin)
+    if client is None or client.is_closed:
+        client = _build_client()
+        _clients[origin] = client
+    return client
+
+
+def init_http_clients(urls):
+    for url in urls:
+        if url:
+            get_client(url)
+    logging.info(f"HTTP pools ready for: {', '.join(sorted(_clients))}")
+
+
+async def close_http_clients():
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        try:
+            await client.aclose()
+        except Exception as e:
+            logging.error(f"Failed to close HTTP client: {e}")
@@ -0,0 +1,65 @@
+import json
+
+# 🧩 Incremental JSON field extraction for streamed LLM output.
+# Feed text deltas as they arrive; every top-level "key": value pair of the
+# (first) JSON object is returned as soon as its value is complete, so the
+# caller can act on e.g. "destination" long before the closing brace.
+# Text before the opening "{" (such as a ```json fence) is ignored.
+
+
+class JsonFieldStream:
+    def __init__(self):
+        self.fields = {}
+        self.done = False
+        self._buf = ""
+        self._pos = 0
+        self._depth = 0
+        self._started = False
+        self._in_string = False
+        self._escaped = False
+        self._pair_start = 0
+
+    def feed(self, text):
+        self._buf += text
+        completed = []
+        buf = self._buf
+        while self._pos < len(buf) and not self.done:
+            ch = buf[self._pos]
+            if not self._started:
+                if ch == "{":
+                    self._started = True
+                    self._depth = 1
+                    self._pair_start = self._pos + 1
+            elif self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit(self._pos, completed)
+                    self.done = True
+            elif ch == "," and self._depth == 1:
+                self._emit(self._pos, completed)
+                self._pair_start = self._pos + 1
+            self._pos += 1
+        return completed
+
+    def _emit(self, end, completed):
+        pair = self._buf[self._pair_start:end].strip()
+        if not pair:
+            return
+        try:
+            parsed = json.loads("{" + pair + "}")
+        except ValueError:
+            return
+        for key, value in parsed.items():
+            self.fields[key] = value
+            completed.append((key, value))
@@ -1,11 +1,25 @@
 import json
-import re
 from datetime import datetime
-from .llm_provider import call_llm_agent
-
-# 🔧 Removes triple backticks and optional 'json' language tag
-def clean_json_response(text: str) -> str:
-    return re.sub(r"^```(?:json)?\n|\n```$", "", text.strip())
+from functools import partial
+from .llm_provider import call_llm_agent, stream_llm_agent, clean_json_response
+from .json_stream import JsonFieldStream
+from .extraction_cache import extraction_cache
+from .trip_parser import fast_path_trip_info
+
+# 🚀 Search-relevant fields known so far, or None while a required one is missing
+def _early_search_info(fields: dict, prefs: dict):
+    origin = fields.get("origin") or prefs.get("home_city")
+    dates = fields.get("dates")
+    if not (origin and fields.get("destination") and isinstance(dates, dict) and dates.get("start")):
+        return None
+    return {
+        "origin": origin,
+        "destination": fields["destination"],
+        "dates": dates,
+        "type": fields.get("type", []),
+        "adults": fields.get("adults", 1),
+        "children": fields.get("children", 0)
+    }
 
 # 🔄 Streaming version (used by /agent-stream)
 async def extract_trip_info_stream(message: str, prefs: dict):
@@ -48,10 +62,36 @@ Extract the following fields:
         now=datetime.now().isoformat()
     )
 
+    fast = fast_path_trip_info(message, prefs)
+    if fast:
+        yield {"stage": "fast_path_parsed", "confidence": fast["confidence"]}
+        yield {"stage": "trip_info_parsed", "data": fast, "final_info": fast}
+        return
+
+    cache_key = extraction_cache.make_key("stream", message, prefs)
+    cached = extraction_cache.get(cache_key)
+    if cached is not None:
+        yield {"stage": "cache_hit"}
+        yield {"stage": "trip_info_parsed", "data": cached, "final_info": cached}
+        return
+
     yield {"stage": "llm_prompt_ready", "prompt_preview": prompt[:500] + "..."}
 
+    # Stream tokens and surface each JSON field as soon as it is complete
+    chunks = []
+    fields = JsonFieldStream()
+    search_ready = False
     try:
-        raw_response = await call_llm_agent(prompt, prefs, tools=["hotel", "flight", "car"], mode="plan")
+        async for delta in stream_llm_agent(prompt, prefs, tools=["hotel", "flight", "car"], mode="plan"):
+            chunks.append(delta)
+            for key, value in fields.feed(delta):
+                yield {"stage": "field_extracted", "field": key, "value": value}
+            if not search_ready:
+                early_info = _early_search_info(fields.fields, prefs)
+                if early_info:
+                    search_ready = True
+                    yield {"stage": "search_ready", "trip_info": early_info}
+        raw_response = "".join(chunks)
         yield {"stage": "llm_response_received", "raw_response": raw_response}
     except Exception as e:
         yield {"stage": "error", "error": f"LLM error: {str(e)}"}
@@ -69,6 +109,7 @@ Extract the following fields:
                 parsed["missing_fields"].remove("origin")
             yield {"stage": "inference_note", "note": f"Inferred origin from prefs: {home_city}"}
 
+        extraction_cache.put(cache_key, parsed)
         yield {"stage": "trip_info_parsed", "data": parsed, "final_info": parsed}
     except Exception as e:
         yield {"stage": "error", "error": f"JSON parsing failed: {str(e)}"}
@@ -76,6 +117,11 @@ Extract the following fields:
 
 # 🔁 Classic non-stream version (used by /agent)
 async def extract_trip_info(message, prefs):
+    # ⚡ Simple, structured messages don't need the LLM at all
+    fast = fast_path_trip_info(message, prefs)
+    if fast:
+        return fast
+
     prompt_template = """
 You are Dude, a friendly and smart AI travel assistant in PLANNING MODE.
 
@@ -114,16 +160,8 @@ Extract the following fields:
     )
 
     try:
-        raw_response = await call_llm_agent(prompt, prefs, tools=["hotel", "flight", "car"], mode="plan")
-        cleaned = clean_json_response(raw_response)
-        parsed = json.loads(cleaned)
-        if not parsed.get("origin") and prefs.get("home_city"):
-            parsed["origin"] = prefs["home_city"]
-            parsed.setdefault("updated_prefs", {})
-            parsed["updated_prefs"]["origin_inferred"] = True
-            if parsed.get("missing_fields") and "origin" in parsed["missing_fields"]:
-                parsed["missing_fields"].remove("origin")
-        return parsed
+        cache_key = extraction_cache.make_key("classic", message, prefs)
+        return await extraction_cache.get_or_compute(cache_key, partial(_parse_trip_info, prompt, prefs))
     except Exception as e:
         return {
             "complete": False,
@@ -134,3 +172,15 @@ Extract the following fields:
             "updated_prefs": {},
             "follow_up": f"⚠️ Could not parse LLM response: {str(e)}"
         }
+
+async def _parse_trip_info(prompt, prefs):
+    raw_response = await call_llm_agent(prompt, prefs, tools=["hotel", "flight", "car"], mode="plan")
+    cleaned = clean_json_response(raw_response)
+    parsed = json.loads(cleaned)
+    if not parsed.get("origin") and prefs.get("home_city"):
+        parsed["origin"] = prefs["home_city"]
+        parsed.setdefault("updated_prefs", {})
+        parsed["updated_prefs"]["origin_inferred"] = True
+        if parsed.get("missing_fields") and "origin" in parsed["missing_fields"]:
+            parsed["missing_fields"].remove("origin")
+    return parsed
@@ -1,26 +1,35 @@
 
-import anthropic
 import os
+from .llm_prompts import SYSTEM_PROMPT
 
-client = anthropic.Anthropic(api_key=os.getenv("CLAUDE_API_KEY"))
+CLAUDE_MODEL = "claude-3-opus-20240229"
 
-LLM_PROMPT_TEMPLATE = """
-You are Dude, a warm, funny, and helpful AI travel planner.
-User message: {message}
-User preferences: {prefs}
-Available tools: {tools}
-"""
+_client = None
+
+# 🐢 The SDK is imported and the client built on first use
+def get_client():
+    global _client
+    if _client is None:
+        import anthropic
+        _client = anthropic.AsyncAnthropic(api_key=os.getenv("CLAUDE_API_KEY"))
+    return _client
 
 async def call_claude(message, prefs, tools, mode="plan"):
-    prompt = LLM_PROMPT_TEMPLATE.format(message=message, prefs=str(prefs), tools=", ".join(tools))
-    response = client.messages.create(
-        model="claude-3-opus-20240229",
+    response = await get_client().messages.create(
+        model=CLAUDE_MODEL,
         max_tokens=1024,
-        messages=[{"role": "user", "content": prompt}]
+        system=SYSTEM_PROMPT,
+        messages=[{"role": "user", "content": message}]
     )
-    return {
-        "text": response.content[0].text,
-        "new_prefs": {"last_message": message},
-        "itinerary": {"days": [], "summary": "Generated trip plan"},
-        "photo_url": "https://example.com/sample.jpg"
-    }
+    return response.content[0].text
+
+# 🔄 Token streaming: yields text deltas as they arrive
+async def stream_claude(message, prefs, tools, mode="plan"):
+    async with get_client().messages.stream(
+        model=CLAUDE_MODEL,
+        max_tokens=1024,
+        system=SYSTEM_PROMPT,
+        messages=[{"role": "user", "content": message}]
+    ) as stream:
+        async for text in stream.text_stream:
+            yield text
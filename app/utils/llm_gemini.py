@@ -1,23 +1,30 @@
-
-import google.generativeai as genai
 import os
+from .llm_prompts import SYSTEM_PROMPT
+
+_genai = None
 
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+# 🐢 The SDK is imported and configured on first use
+def get_client():
+    global _genai
+    if _genai is None:
+        import google.generativeai as genai
+        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+        _genai = genai
+    return _genai
 
-LLM_PROMPT_TEMPLATE = """
-You are Dude, a warm, funny, and helpful AI travel planner.
-User message: {message}
-User preferences: {prefs}
-Available tools: {tools}
-"""
+# gemini-pro has no system role, so the shared system prompt leads the user message
+def _prompt(message):
+    return f"{SYSTEM_PROMPT}\n\n{message}"
 
 async def call_gemini(message, prefs, tools, mode="plan"):
-    model = genai.GenerativeModel("gemini-pro")
-    prompt = LLM_PROMPT_TEMPLATE.format(message=message, prefs=str(prefs), tools=", ".join(tools))
-    response = model.generate_content(prompt)
-    return {
-        "text": response.text,
-        "new_prefs": {"last_message": message},
-        "itinerary": {"days": [], "summary": "Generated trip plan"},
-        "photo_url": "https://example.com/sample.jpg"
-    }
+    model = get_client().GenerativeModel("gemini-pro")
+    response = await model.generate_content_async(_prompt(message))
+    return response.text
+
+# 🔄 Token streaming: yields text deltas as they arrive
+async def stream_gemini(message, prefs, tools, mode="plan"):
+    model = get_client().GenerativeModel("gemini-pro")
+    response = await model.generate_content_async(_prompt(message), stream=True)
+    async for chunk in response:
+        if chunk.text:
+            yield chunk.text
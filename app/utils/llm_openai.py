@@ -1,25 +1,44 @@
-from openai import AsyncOpenAI
 import os
+from .llm_prompts import SYSTEM_PROMPT
 
-client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))  # Make sure this is set
+_client = None
+
+# 🐢 The SDK is imported and the client built on first use
+def get_client():
+    global _client
+    if _client is None:
+        from openai import AsyncOpenAI
+        _client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))  # Make sure this is set
+    return _client
 
-async def call_openai(message, prefs, tools, mode="plan"):
-    system_prompt = (
-        "You are Dude, a warm, funny, and helpful AI travel planner that supports multiple languages including Hebrew. "
-        "Help the user plan a trip by understanding their message and preferences. "
-        "Extract structured trip information even from Hebrew text. "
-        "Respond ONLY with JSON."
-    )
 
+async def call_openai(message, prefs, tools, mode="plan"):
     messages = [
-        {"role": "system", "content": system_prompt},
+        {"role": "system", "content": SYSTEM_PROMPT},
         {"role": "user", "content": message}
     ]
 
-    response = await client.chat.completions.create(
+    response = await get_client().chat.completions.create(
         model="gpt-4o",  # or gpt-3.5-turbo if you're not using GPT-4
         messages=messages,
         temperature=0.7  # Use this for structured JSON replies if using GPT-4o
     )
 
     return response.choices[0].message.content
+
+# 🔄 Token streaming: yields text deltas as they arrive
+async def stream_openai(message, prefs, tools, mode="plan"):
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": message}
+    ]
+
+    stream = await get_client().chat.completions.create(
+        model="gpt-4o",
+        messages=messages,
+        temperature=0.7,
+        stream=True
+    )
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
@@ -1,16 +1,235 @@
 
 import os
+import re
+import json
+import time
+import asyncio
+import logging
+import importlib
+from functools import partial
+from contextlib import asynccontextmanager
+from .provider_health import provider_health, CircuitOpen
+from .tracing import detached_span
+
+# 🧭 Latency-aware LLM router.
+# LLM_PROVIDER is the preferred provider; LLM_FALLBACK_PROVIDERS (default: every
+# other provider with an API key set) are used on failure. Healthy providers are
+# tried fastest-first (observed p50), breakers come from provider_health, and with
+# LLM_HEDGE=true a second provider is fired once the first exceeds its p95 latency;
+# the first valid JSON answer wins. Every provider returns the completion text.
+# Provider modules, their SDKs and clients load on first use; warm_up() preloads them.
+
+LLM_PROVIDERS = {
+    "openai": ("app.utils.llm_openai", "call_openai", "stream_openai", "OPENAI_API_KEY"),
+    "gemini": ("app.utils.llm_gemini", "call_gemini", "stream_gemini", "GEMINI_API_KEY"),
+    "claude": ("app.utils.llm_claude", "call_claude", "stream_claude", "CLAUDE_API_KEY"),
+}
 
 PROVIDER = os.getenv("LLM_PROVIDER", "openai").lower()
+if PROVIDER not in LLM_PROVIDERS:
+    raise ValueError(f"Unsupported LLM_PROVIDER: {PROVIDER}")
 
-if PROVIDER == "openai":
-    from .llm_openai import call_openai as _call_llm
-elif PROVIDER == "gemini":
-    from .llm_gemini import call_gemini as _call_llm
-elif PROVIDER == "claude":
-    from .llm_claude import call_claude as _call_llm
+_fallbacks = os.getenv("LLM_FALLBACK_PROVIDERS")
+if _fallbacks is None:
+    LLM_FALLBACK_PROVIDERS = [name for name, spec in LLM_PROVIDERS.items() if name != PROVIDER and os.getenv(spec[3])]
 else:
-    raise ValueError(f"Unsupported LLM_PROVIDER: {PROVIDER}")
+    LLM_FALLBACK_PROVIDERS = [name.strip().lower() for name in _fallbacks.split(",") if name.strip().lower() in LLM_PROVIDERS]
+
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+# Streams must produce their first token within this, and finish within LLM_TIMEOUT
+LLM_FIRST_TOKEN_TIMEOUT = float(os.getenv("LLM_FIRST_TOKEN_TIMEOUT", "20"))
+LLM_HEDGE = os.getenv("LLM_HEDGE", "false").lower() in ("1", "true", "yes")
+# Used as the hedge delay until the first provider has a p95 of its own
+LLM_HEDGE_DELAY = float(os.getenv("LLM_HEDGE_DELAY", "8.0"))
+
+# 🚦 Per-provider concurrency limit; callers beyond it queue on the semaphore
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+
+_semaphores = {}
+llm_stats = {}
+
+
+# 🔧 Removes triple backticks and optional 'json' language tag
+def clean_json_response(text: str) -> str:
+    return re.sub(r"^```(?:json)?\n|\n```$", "", text.strip())
+
+
+def _load(provider, kind):
+    module_name, call_name, stream_name, _ = LLM_PROVIDERS[provider]
+    module = importlib.import_module(module_name)
+    return getattr(module, call_name if kind == "call" else stream_name)
+
+
+def warm_up():
+    # Imports the SDK and builds the client of every provider the router may use
+    for provider in [PROVIDER] + [name for name in LLM_FALLBACK_PROVIDERS if name != PROVIDER]:
+        try:
+            importlib.import_module(LLM_PROVIDERS[provider][0]).get_client()
+        except Exception as e:
+            logging.warning(f"[LLM] Warm-up of {provider} failed: {e}")
+
+
+def _health(provider):
+    return provider_health.get(f"llm:{provider}")
+
+
+def _candidates():
+    order = [PROVIDER] + [name for name in LLM_FALLBACK_PROVIDERS if name != PROVIDER]
+    healthy = [name for name in order if _health(name).available()]
+
+    def speed(name):
+        p50 = _health(name).percentile(50)
+        return (p50 if p50 is not None else float("inf"), order.index(name))
+
+    return sorted(healthy, key=speed)
+
+
+def _limits_for(provider):
+    if provider not in _semaphores:
+        limit = int(os.getenv(f"LLM_MAX_CONCURRENCY_{provider.upper()}", LLM_MAX_CONCURRENCY))
+        _semaphores[provider] = asyncio.Semaphore(limit)
+        llm_stats[provider] = {
+            "limit": limit, "calls": 0, "errors": 0, "waiting": 0, "inflight": 0,
+            "queue_seconds_total": 0.0, "queue_seconds_max": 0.0, "call_seconds_total": 0.0
+        }
+    return _semaphores[provider], llm_stats[provider]
+
+
+@asynccontextmanager
+async def _provider_slot(provider):
+    semaphore, stats = _limits_for(provider)
+    queued_at = time.perf_counter()
+    stats["waiting"] += 1
+    try:
+        await semaphore.acquire()
+    finally:
+        stats["waiting"] -= 1
+    started = time.perf_counter()
+    queued = started - queued_at
+    stats["queue_seconds_total"] += queued
+    stats["queue_seconds_max"] = max(stats["queue_seconds_max"], queued)
+    stats["inflight"] += 1
+    try:
+        yield
+    except Exception:
+        stats["errors"] += 1
+        raise
+    finally:
+        stats["inflight"] -= 1
+        stats["calls"] += 1
+        stats["call_seconds_total"] += time.perf_counter() - started
+        semaphore.release()
+
+
+async def _complete(provider, message, prefs, tools, mode, expect_json):
+    text = await _load(provider, "call")(message, prefs, tools, mode)
+    if not isinstance(text, str):
+        raise ValueError(f"{provider} returned {type(text).__name__}, expected text")
+    if expect_json:
+        # An unparseable answer counts as a provider failure, so the next one gets a chance
+        json.loads(clean_json_response(text))
+    return text
+
+
+async def _attempt(provider, message, prefs, tools, mode, expect_json):
+    async with _provider_slot(provider):
+        return await provider_health.call(
+            f"llm:{provider}", partial(_complete, provider, message, prefs, tools, mode, expect_json), LLM_TIMEOUT
+        )
+
+
+async def _first_success(candidates, args, hedge):
+    waiting = list(candidates)
+    pending = {}
+    last_error = None
+
+    def launch():
+        provider = waiting.pop(0)
+        pending[asyncio.create_task(_attempt(provider, *args))] = provider
+
+    launch()
+    try:
+        while pending:
+            delay = None
+            if hedge and waiting:
+                delay = _health(candidates[0]).percentile(95) or LLM_HEDGE_DELAY
+            done, _ = await asyncio.wait(pending, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                logging.info(f"[LLM] Hedging with {waiting[0]} after {delay:.2f}s")
+                launch()
+                continue
+            for task in done:
+                provider = pending.pop(task)
+                if task.exception() is None:
+                    return task.result()
+                last_error = task.exception()
+                logging.warning(f"[LLM] {provider} failed: {last_error}")
+            if waiting and not pending:
+                launch()
+        raise last_error
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def call_llm_agent(message, prefs, tools, mode="plan", expect_json=True):
+    candidates = _candidates()
+    if not candidates:
+        raise CircuitOpen("No healthy LLM provider available")
+    return await _first_success(candidates, (message, prefs, tools, mode, expect_json), hedge=LLM_HEDGE)
+
+
+async def _timed_stream(stream):
+    # Like the stream, but raises asyncio.TimeoutError when it stalls, as call_llm_agent's calls do
+    started = time.monotonic()
+    first = True
+    try:
+        while True:
+            remaining = started + LLM_TIMEOUT - time.monotonic()
+            timeout = min(LLM_FIRST_TOKEN_TIMEOUT, remaining) if first else remaining
+            try:
+                delta = await asyncio.wait_for(stream.__anext__(), timeout=max(timeout, 0))
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                waited_for = "first token" if first else "end of stream"
+                raise asyncio.TimeoutError(f"No {waited_for} after {time.monotonic() - started:.1f}s")
+            first = False
+            yield delta
+    finally:
+        await stream.aclose()
+
 
-async def call_llm_agent(message, prefs, tools, mode="plan"):
-    return await _call_llm(message, prefs, tools, mode)
+async def stream_llm_agent(message, prefs, tools, mode="plan"):
+    # Fails over to the next provider only if nothing was streamed yet
+    candidates = _candidates()
+    if not candidates:
+        raise CircuitOpen("No healthy LLM provider available")
+    last_error = None
+    for provider in candidates:
+        health = _health(provider)
+        if not health.allow():
+            continue
+        started = time.perf_counter()
+        streamed = False
+        try:
+            # The provider slot is held for the whole stream
+            async with _provider_slot(provider):
+                with detached_span(f"stream llm:{provider}"):
+                    async for delta in _timed_stream(_load(provider, "stream")(message, prefs, tools, mode)):
+                        streamed = True
+                        yield delta
+            health.record(time.perf_counter() - started, True)
+            return
+        except (asyncio.CancelledError, GeneratorExit):
+            health.release_probe()
+            raise
+        except Exception as e:
+            health.record(time.perf_counter() - started, False)
+            if streamed:
+                raise
+            last_error = e
+            logging.warning(f"[LLM] {provider} stream failed, trying next provider: {e}")
+    raise last_error or CircuitOpen("No healthy LLM provider available")
@@ -1,49 +1,86 @@
 import os
 import uuid
+import asyncio
 from datetime import datetime
-from supabase import create_client
-from elasticsearch import Elasticsearch
 from dotenv import load_dotenv
+from app.utils.db import db
+from app.utils.write_behind import write_behind
+from app.utils.redirect_cache import redirect_cache
+from app.utils.redirect_tokens import SIGNED_REDIRECTS, REDIRECT_PERSIST_SIGNED, sign_redirect
 
 load_dotenv()
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-
 ELASTIC_URL = os.getenv("ELASTIC_URL", "http://localhost:9200")
-es = Elasticsearch(ELASTIC_URL)
+_es = None
+
+# 🐢 The Elasticsearch SDK is imported and its client built on first use, not at import
+def get_es():
+    global _es
+    if _es is None:
+        from elasticsearch import Elasticsearch
+        _es = Elasticsearch(ELASTIC_URL)
+    return _es
+
+# 📨 Bulk writers used by the write-behind queue
+async def _elk_bulk_index(index, records):
+    from elasticsearch import helpers
+    # The Elasticsearch client is synchronous, keep it off the event loop
+    await asyncio.to_thread(helpers.bulk, get_es(), [{"_index": index, "_source": record} for record in records])
+
+write_behind.register_sink("supabase", db.insert)
+write_behind.register_sink("elk", _elk_bulk_index)
+# Redirect links are handed out before their row is written, so those rows must not be lost
+write_behind.make_durable("supabase", "redirects")
+
+# ⚡ Redirect cache backend
+redirect_cache.register_backend(db.get_redirect, db.increment_redirect_clicks)
 
 def log_supabase(event_type, query, request):
     try:
-        supabase.table("search_logs").insert({
+        write_behind.put("supabase", "search_logs", {
             "user_id": request.headers.get("X-User-ID", "anonymous"),
             "channel": request.headers.get("X-Channel", "NA"),
             "type": event_type,
             "query": query,
             "created_at": datetime.utcnow().isoformat()
-        }).execute()
+        })
     except Exception as e:
         print(f"[Supabase] Logging failed: {e}")
 
 def store_redirect(original_url, content_type, metadata):
+    base_domain = os.getenv("BASE_DOMAIN", "https://yourdomain.com")
+
+    if SIGNED_REDIRECTS:
+        token = sign_redirect(original_url, content_type)
+        if REDIRECT_PERSIST_SIGNED:
+            write_behind.put("supabase", "redirects", {
+                "guid": str(uuid.uuid5(uuid.NAMESPACE_URL, token)),
+                "original_url": original_url,
+                "type": content_type,
+                "metadata": {**metadata, "token": token},
+                "created_at": datetime.utcnow().isoformat()
+            })
+        return token, f"{base_domain}/r/{token}"
+
     guid = str(uuid.uuid4())
     try:
-        supabase.table("redirects").insert({
+        row = {
             "guid": guid,
             "original_url": original_url,
             "type": content_type,
-            "metadata": metadata,
+            # A copy: callers keep decorating their result dict after this (redirect_url, provider)
+            "metadata": dict(metadata),
             "created_at": datetime.utcnow().isoformat()
-        }).execute()
+        }
+        write_behind.put("supabase", "redirects", row)
+        redirect_cache.prime(row)
     except Exception as e:
         print(f"[Supabase] Redirect logging failed: {e}")
 
-    base_domain = os.getenv("BASE_DOMAIN", "https://yourdomain.com")
     return guid, f"{base_domain}/r/{guid}"
 
 def log_elk(index, data):
     try:
-        es.index(index=index, body=data)
+        write_behind.put("elk", index, data)
     except Exception as e:
-        print(f"[ELK] Logging failed: {e}")
\ No newline at end of file
+        print(f"[ELK] Logging failed: {e}")
@@ -1,22 +1,15 @@
-from supabase import create_client
-import os
+from app.utils.db import db
+from app.utils.write_behind import write_behind
+from app.utils.preference_store import preference_store
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+preference_store.register_backend(db.get_user_prefs, db.save_user_prefs)
 
 async def get_user_preferences(user_id):
-    if not user_id:
-        return {}
-    res = supabase.table("user_preferences").select("prefs").eq("user_id", user_id).execute()
-    if res.data:
-        return res.data[0].get("prefs", {})
-    return {}
+    return await preference_store.get(user_id)
 
 async def save_user_preferences(user_id, prefs):
-    if not user_id:
-        return
-    supabase.table("user_preferences").update({"prefs": prefs}).eq("user_id", user_id).execute()
+    # prefs holds only the changed fields; they are merged into the stored prefs
+    await preference_store.update(user_id, prefs)
 
 async def log_interaction(user_id, message, direction, channel="telegram"):
     if not user_id:
@@ -27,4 +20,4 @@ async def log_interaction(user_id, message, direction, channel="telegram"):
         "query": {"message": message},
         "channel": channel
     }
-    supabase.table("search_logs").insert(log_entry).execute()
+    write_behind.put("supabase", "search_logs", log_entry)
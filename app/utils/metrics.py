@@ -0,0 +1,201 @@
+import os
+import time
+import asyncio
+import logging
+from bisect import bisect_left
+from contextlib import contextmanager
+from .tracing import span
+
+# 📈 In-process metrics in the Prometheus text format, served on GET /metrics.
+# Everything runs on the event loop, so series are plain dicts updated without locks;
+# observe() only bumps one bucket, the cumulative buckets are built at scrape time.
+# Counters that already live on the caches and the db layer are read by collectors
+# at scrape time instead of being counted twice.
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.5"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._series = {}
+
+    def inc(self, *label_values, amount=1):
+        self._series[label_values] = self._series.get(label_values, 0) + amount
+
+    def set_total(self, value, *label_values):
+        # For counters mirrored from stats kept elsewhere (see register_collector)
+        self._series[label_values] = value
+
+    def samples(self):
+        for values, count in self._series.items():
+            yield self.name, _labels(self.labels, values), count
+
+
+class Gauge(Counter):
+    kind = "gauge"
+    set = Counter.set_total
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [per-bucket counts (+Inf last), sum]
+
+    def observe(self, value, *label_values):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    @contextmanager
+    def time(self, *label_values):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *label_values)
+
+    def samples(self):
+        for values, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield f"{self.name}_bucket", _labels(self.labels, values, f'le="{le}"'), cumulative
+            yield f"{self.name}_sum", _labels(self.labels, values), total
+            yield f"{self.name}_count", _labels(self.labels, values), cumulative
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lag_task = None
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self._add(Counter(name, help, labels))
+
+    def gauge(self, name, help, labels=()):
+        return self._add(Gauge(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def register_collector(self, collect):
+        # collect() runs at scrape time and refreshes gauges/counters from existing stats
+        self._collectors.append(collect)
+
+    def render(self):
+        for collect in self._collectors:
+            try:
+                collect()
+            except Exception as e:
+                logging.error(f"[Metrics] Collector failed: {e}")
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {value}")
+        return "\n".join(lines) + "\n"
+
+    # ⏱️ Event-loop lag: how late a periodic sleep wakes up
+    async def start(self):
+        if METRICS_ENABLED and self._lag_task is None:
+            self._lag_task = asyncio.create_task(self._measure_lag())
+
+    async def stop(self):
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            try:
+                await self._lag_task
+            except asyncio.CancelledError:
+                pass
+            self._lag_task = None
+
+    async def _measure_lag(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(LOOP_LAG_INTERVAL)
+            lag = max(0.0, time.perf_counter() - started - LOOP_LAG_INTERVAL)
+            event_loop_lag.observe(lag)
+            event_loop_lag_last.set(lag)
+
+
+metrics = MetricsRegistry()
+
+stage_seconds = metrics.histogram(
+    "dude_stage_seconds", "Time spent in each request pipeline stage", ("stage",)
+)
+upstream_seconds = metrics.histogram(
+    "dude_upstream_seconds", "Latency of calls to affiliates and LLM providers", ("provider", "outcome")
+)
+upstream_errors = metrics.counter(
+    "dude_upstream_errors_total", "Failed calls to affiliates and LLM providers", ("provider",)
+)
+upstream_rejected = metrics.counter(
+    "dude_upstream_rejected_total", "Calls rejected by an open circuit breaker", ("provider",)
+)
+cache_requests = metrics.counter(
+    "dude_cache_requests_total", "Cache lookups by outcome", ("cache", "result")
+)
+cache_hit_ratio = metrics.gauge(
+    "dude_cache_hit_ratio", "Share of cache lookups served from the cache", ("cache",)
+)
+db_queries = metrics.counter(
+    "dude_db_queries_total", "Database queries by operation", ("operation",)
+)
+db_errors = metrics.counter(
+    "dude_db_errors_total", "Failed database queries by operation", ("operation",)
+)
+event_loop_lag = metrics.histogram(
+    "dude_event_loop_lag_seconds", "How late the event loop wakes a periodic timer", buckets=LAG_BUCKETS
+)
+event_loop_lag_last = metrics.gauge(
+    "dude_event_loop_lag_last_seconds", "Most recent event-loop lag sample"
+)
+
+
+@contextmanager
+def stage(name):
+    """Times one pipeline stage into dude_stage_seconds and traces it as a span."""
+    with span(name), stage_seconds.time(name):
+        yield
+
+
+def record_cache(cache, hits, misses):
+    """Export a cache's own hit/miss counters (call from a collector)."""
+    cache_requests.set_total(hits, cache, "hit")
+    cache_requests.set_total(misses, cache, "miss")
+    total = hits + misses
+    cache_hit_ratio.set(round(hits / total, 4) if total else 0.0, cache)
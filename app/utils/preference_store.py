@@ -0,0 +1,135 @@
+import os
+import copy
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+
+# 👤 Cached user preferences with coalesced write-through.
+# Reads are served from an in-process LRU/TTL cache (one database load per miss,
+# shared by concurrent callers). update() merges the changes into the cached prefs
+# right away and schedules a single database write PREFS_WRITE_DELAY seconds later,
+# so a burst of updates from a chatty user becomes one write of the final state.
+
+PREFS_CACHE_SIZE = int(os.getenv("PREFS_CACHE_SIZE", "10000"))
+PREFS_CACHE_TTL = float(os.getenv("PREFS_CACHE_TTL", "600"))
+PREFS_WRITE_DELAY = float(os.getenv("PREFS_WRITE_DELAY", "0.5"))
+
+
+def merge_prefs(current, changes):
+    """Deep-merge changes into current; a None value removes the key."""
+    merged = dict(current or {})
+    for key, value in (changes or {}).items():
+        if value is None:
+            merged.pop(key, None)
+        elif isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_prefs(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+class PreferenceStore:
+    def __init__(self, max_size=PREFS_CACHE_SIZE, ttl=PREFS_CACHE_TTL, write_delay=PREFS_WRITE_DELAY):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.write_delay = write_delay
+        self.stats = {"hits": 0, "misses": 0, "updates": 0, "writes": 0, "write_errors": 0}
+        self._cache = OrderedDict()  # user_id -> (prefs, expires_at)
+        self._loading = {}           # user_id -> Task
+        self._writes = {}            # user_id -> scheduled write Task
+        self._pending = {}           # user_id -> merged prefs not written yet
+        self._load = None
+        self._save = None
+
+    def register_backend(self, load, save):
+        # Both are coroutine functions:
+        #   load(user_id) -> dict
+        #   save(user_id, prefs) -> None
+        self._load = load
+        self._save = save
+
+    def _put(self, user_id, prefs):
+        self._cache[user_id] = (prefs, time.monotonic() + self.ttl)
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+    async def _cached(self, user_id):
+        if user_id in self._pending:
+            self.stats["hits"] += 1
+            return self._pending[user_id]
+        entry = self._cache.get(user_id)
+        if entry is not None and entry[1] > time.monotonic():
+            self.stats["hits"] += 1
+            self._cache.move_to_end(user_id)
+            return entry[0]
+
+        self.stats["misses"] += 1
+        task = self._loading.get(user_id)
+        if task is None:
+            async def load():
+                try:
+                    prefs = await self._load(user_id) or {}
+                    self._put(user_id, prefs)
+                    return prefs
+                finally:
+                    self._loading.pop(user_id, None)
+            task = self._loading[user_id] = asyncio.create_task(load())
+        return await asyncio.shield(task)
+
+    async def get(self, user_id):
+        if not user_id:
+            return {}
+        return copy.deepcopy(await self._cached(user_id))
+
+    async def update(self, user_id, changes):
+        if not user_id or not changes:
+            return
+        loaded = await self._cached(user_id)
+        # Another update may have landed while this one waited for the load: merge onto the newest state
+        current = self._pending.get(user_id)
+        if current is None:
+            entry = self._cache.get(user_id)
+            current = entry[0] if entry is not None else loaded
+        merged = merge_prefs(current, changes)
+        self._put(user_id, merged)
+        self._pending[user_id] = merged
+        self.stats["updates"] += 1
+        if user_id not in self._writes:
+            self._writes[user_id] = asyncio.create_task(self._write_later(user_id))
+
+    async def _write_later(self, user_id):
+        try:
+            await asyncio.sleep(self.write_delay)
+        finally:
+            # Write the latest merged state, even when flushed early on shutdown
+            self._writes.pop(user_id, None)
+            await self._write(user_id)
+
+    async def _write(self, user_id):
+        prefs = self._pending.pop(user_id, None)
+        if prefs is None:
+            return
+        try:
+            await self._save(user_id, copy.deepcopy(prefs))
+            self.stats["writes"] += 1
+        except Exception as e:
+            self.stats["write_errors"] += 1
+            logging.error(f"[Prefs] Saving preferences for user {user_id} failed: {e}")
+
+    async def flush(self):
+        tasks = list(self._writes.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        # Writes whose task was cancelled before it started running
+        for user_id in list(self._pending):
+            await self._write(user_id)
+
+    def snapshot(self):
+        return {**self.stats, "size": len(self._cache), "pending_writes": len(self._writes)}
+
+
+preference_store = PreferenceStore()
@@ -0,0 +1,212 @@
+import os
+import time
+import asyncio
+import logging
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+import httpx
+from .metrics import upstream_seconds, upstream_errors, upstream_rejected
+from .tracing import span
+
+# 🩺 Per-provider health: rolling latency/error window, circuit breaker and adaptive timeouts.
+#   closed    - calls flow, outcomes are recorded
+#   open      - calls fail fast with CircuitOpen until HEALTH_OPEN_SECONDS have passed
+#   half_open - a single probe call is let through; success closes, failure re-opens
+# Timeouts are derived from the observed p99 once enough samples exist, capped by the caller's deadline.
+# A 4xx answer (other than 408/429) is the caller's mistake, not the provider's:
+# it is re-raised but counted as a healthy response. Callers validate their input
+# before calling, so bad requests never reach the breaker as other exceptions.
+# Callers can cap concurrent calls per provider for a unit of work (e.g. one batch
+# request) with `with ProviderLimits(n).applied():`; tasks started inside inherit it.
+
+HEALTH_WINDOW_SIZE = int(os.getenv("HEALTH_WINDOW_SIZE", "200"))
+HEALTH_WINDOW_SECONDS = float(os.getenv("HEALTH_WINDOW_SECONDS", "120"))
+HEALTH_MIN_SAMPLES = int(os.getenv("HEALTH_MIN_SAMPLES", "10"))
+HEALTH_ERROR_RATE = float(os.getenv("HEALTH_ERROR_RATE", "0.5"))
+HEALTH_CONSECUTIVE_FAILURES = int(os.getenv("HEALTH_CONSECUTIVE_FAILURES", "5"))
+HEALTH_OPEN_SECONDS = float(os.getenv("HEALTH_OPEN_SECONDS", "30"))
+HEALTH_TIMEOUT_FACTOR = float(os.getenv("HEALTH_TIMEOUT_FACTOR", "1.5"))
+HEALTH_MIN_TIMEOUT = float(os.getenv("HEALTH_MIN_TIMEOUT", "1.0"))
+HEALTH_TIMEOUT_MIN_SAMPLES = int(os.getenv("HEALTH_TIMEOUT_MIN_SAMPLES", "20"))
+
+
+class CircuitOpen(Exception):
+    pass
+
+
+def is_provider_failure(error):
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status >= 500 or status in (408, 429)
+    return True
+
+
+_limits = contextvars.ContextVar("provider_limits", default=None)
+
+
+class ProviderLimits:
+    """At most `per_provider` concurrent upstream calls per provider, while applied."""
+
+    def __init__(self, per_provider):
+        self.per_provider = per_provider
+        self._semaphores = {}
+
+    def slot(self, name):
+        semaphore = self._semaphores.get(name)
+        if semaphore is None:
+            semaphore = self._semaphores[name] = asyncio.Semaphore(self.per_provider)
+        return semaphore
+
+    @contextmanager
+    def applied(self):
+        token = _limits.set(self)
+        try:
+            yield self
+        finally:
+            _limits.reset(token)
+
+
+class ProviderHealth:
+    def __init__(self, name):
+        self.name = name
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.consecutive_failures = 0
+        self.probe_inflight = False
+        self._samples = deque(maxlen=HEALTH_WINDOW_SIZE)  # (timestamp, latency, ok)
+
+    def _recent(self):
+        cutoff = time.monotonic() - HEALTH_WINDOW_SECONDS
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+        return self._samples
+
+    def percentile(self, pct):
+        latencies = sorted(latency for _, latency, ok in self._recent() if ok)
+        if not latencies:
+            return None
+        index = min(len(latencies) - 1, int(round(pct / 100 * (len(latencies) - 1))))
+        return latencies[index]
+
+    def error_rate(self):
+        samples = self._recent()
+        if not samples:
+            return 0.0
+        return sum(1 for _, _, ok in samples if not ok) / len(samples)
+
+    def timeout(self, deadline):
+        if sum(1 for _, _, ok in self._recent() if ok) < HEALTH_TIMEOUT_MIN_SAMPLES:
+            return deadline
+        p99 = self.percentile(99)
+        return min(deadline, max(HEALTH_MIN_TIMEOUT, p99 * HEALTH_TIMEOUT_FACTOR))
+
+    def available(self):
+        # Like allow(), but without claiming the half-open probe
+        if self.state == "open":
+            return time.monotonic() - self.opened_at >= HEALTH_OPEN_SECONDS
+        return self.state == "closed" or not self.probe_inflight
+
+    def allow(self):
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= HEALTH_OPEN_SECONDS:
+            self.state = "half_open"
+        if self.state == "half_open" and not self.probe_inflight:
+            self.probe_inflight = True
+            return True
+        upstream_rejected.inc(self.name)
+        return False
+
+    def _open(self):
+        if self.state != "open":
+            logging.warning(f"[Health] Circuit for {self.name} opened (error rate {self.error_rate():.0%})")
+        self.state = "open"
+        self.opened_at = time.monotonic()
+
+    def record(self, latency, ok):
+        self._samples.append((time.monotonic(), latency, ok))
+        upstream_seconds.observe(latency, self.name, "ok" if ok else "error")
+        if not ok:
+            upstream_errors.inc(self.name)
+        if self.state == "half_open":
+            self.probe_inflight = False
+            if ok:
+                logging.info(f"[Health] Circuit for {self.name} closed after successful probe")
+                self.state = "closed"
+                self.consecutive_failures = 0
+                # Start the error window fresh so old failures don't re-open it immediately
+                self._samples = deque([self._samples[-1]], maxlen=HEALTH_WINDOW_SIZE)
+            else:
+                self._open()
+            return
+
+        if ok:
+            self.consecutive_failures = 0
+            return
+        self.consecutive_failures += 1
+        samples = self._recent()
+        if self.consecutive_failures >= HEALTH_CONSECUTIVE_FAILURES or (
+            len(samples) >= HEALTH_MIN_SAMPLES and self.error_rate() >= HEALTH_ERROR_RATE
+        ):
+            self._open()
+
+    def release_probe(self):
+        # A probe that was cancelled tells us nothing, let the next call probe again
+        if self.state == "half_open":
+            self.probe_inflight = False
+
+    def snapshot(self):
+        p50, p95, p99 = self.percentile(50), self.percentile(95), self.percentile(99)
+        return {
+            "state": self.state,
+            "samples": len(self._recent()),
+            "error_rate": round(self.error_rate(), 3),
+            "p50": p50 and round(p50, 3),
+            "p95": p95 and round(p95, 3),
+            "p99": p99 and round(p99, 3),
+        }
+
+
+class HealthRegistry:
+    def __init__(self):
+        self._providers = {}
+
+    def get(self, name):
+        health = self._providers.get(name)
+        if health is None:
+            health = self._providers[name] = ProviderHealth(name)
+        return health
+
+    async def call(self, name, fetch, deadline):
+        """Run fetch() under the provider's breaker and adaptive timeout."""
+        limits = _limits.get()
+        if limits is None:
+            return await self._call(name, fetch, deadline)
+        # Waiting for a slot is not charged to the provider's latency or timeout
+        async with limits.slot(name):
+            return await self._call(name, fetch, deadline)
+
+    async def _call(self, name, fetch, deadline):
+        health = self.get(name)
+        if not health.allow():
+            raise CircuitOpen(f"Circuit open for {name}")
+        timeout = health.timeout(deadline)
+        started = time.perf_counter()
+        with span(f"call {name}", timeout=timeout, breaker=health.state):
+            try:
+                result = await asyncio.wait_for(fetch(), timeout=timeout)
+            except asyncio.CancelledError:
+                health.release_probe()
+                raise
+            except Exception as e:
+                health.record(time.perf_counter() - started, not is_provider_failure(e))
+                raise
+            health.record(time.perf_counter() - started, True)
+            return result
+
+    def snapshot(self):
+        return {name: health.snapshot() for name, health in self._providers.items()}
+
+
+provider_health = HealthRegistry()
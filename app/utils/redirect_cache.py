@@ -0,0 +1,142 @@
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from .write_behind import WRITE_BEHIND_FLUSH_INTERVAL
+
+# ⚡ Hot path for /r/{guid}: an in-process LRU/TTL cache of redirect rows
+# (including negative lookups) plus click counts aggregated in memory and
+# flushed in batches with one atomic increment call.
+#
+# The increment is a Postgres function exposed through PostgREST RPC:
+#
+#   create or replace function increment_redirect_clicks(p_guids text[], p_deltas int[])
+#   returns void language sql as $$
+#     update redirects r set clicks = coalesce(r.clicks, 0) + d.delta
+#     from unnest(p_guids, p_deltas) as d(guid, delta)
+#     where r.guid::text = d.guid;
+#   $$;
+
+REDIRECT_CACHE_SIZE = int(os.getenv("REDIRECT_CACHE_SIZE", "50000"))
+REDIRECT_CACHE_TTL = float(os.getenv("REDIRECT_CACHE_TTL", "300"))
+# Rows with a max_clicks policy are re-read more often so other replicas' clicks are seen
+REDIRECT_CACHE_LIMITED_TTL = float(os.getenv("REDIRECT_CACHE_LIMITED_TTL", "5"))
+# A guid created on another replica reaches the database one write-behind flush later;
+# a longer negative TTL would keep answering 404 for it after the row exists
+REDIRECT_CACHE_NEGATIVE_TTL = float(os.getenv("REDIRECT_CACHE_NEGATIVE_TTL", str(WRITE_BEHIND_FLUSH_INTERVAL)))
+REDIRECT_CLICK_FLUSH_INTERVAL = float(os.getenv("REDIRECT_CLICK_FLUSH_INTERVAL", "2.0"))
+
+
+class RedirectCache:
+    def __init__(self, max_size=REDIRECT_CACHE_SIZE):
+        self.max_size = max_size
+        self.stats = {"hits": 0, "misses": 0, "negative_hits": 0, "clicks_flushed": 0, "flush_errors": 0}
+        self._rows = OrderedDict()   # guid -> (row | None, expires_at)
+        self._inflight = {}          # guid -> Future, coalesces concurrent misses
+        self._pending_clicks = {}    # guid -> clicks not yet written to the database
+        self._fetch_row = None
+        self._increment_clicks = None
+        self._task = None
+
+    def register_backend(self, fetch_row, increment_clicks):
+        # Both are coroutine functions:
+        #   fetch_row(guid) -> dict | None
+        #   increment_clicks(guids, deltas) -> None
+        self._fetch_row = fetch_row
+        self._increment_clicks = increment_clicks
+
+    def _ttl_for(self, row):
+        if row is None:
+            return REDIRECT_CACHE_NEGATIVE_TTL
+        if row.get("max_clicks") is not None:
+            return REDIRECT_CACHE_LIMITED_TTL
+        return REDIRECT_CACHE_TTL
+
+    def _put(self, guid, row):
+        self._rows[guid] = (row, time.monotonic() + self._ttl_for(row))
+        self._rows.move_to_end(guid)
+        if len(self._rows) > self.max_size:
+            self._rows.popitem(last=False)
+
+    def prime(self, row):
+        """Cache a freshly created redirect so clicks resolve before its insert is flushed."""
+        self._put(row["guid"], {"clicks": 0, **row})
+
+    async def get(self, guid):
+        entry = self._rows.get(guid)
+        if entry is not None and entry[1] > time.monotonic():
+            self._rows.move_to_end(guid)
+            if entry[0] is None:
+                self.stats["negative_hits"] += 1
+            else:
+                self.stats["hits"] += 1
+            return entry[0]
+
+        self.stats["misses"] += 1
+        future = self._inflight.get(guid)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[guid] = future
+        try:
+            row = await self._fetch_row(guid)
+            if row is not None:
+                # Clicks counted here but not flushed yet are not in the database row
+                row["clicks"] = (row.get("clicks") or 0) + self._pending_clicks.get(guid, 0)
+            self._put(guid, row)
+            future.set_result(row)
+            return row
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting on it
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(guid, None)
+
+    def record_click(self, guid, row):
+        row["clicks"] = (row.get("clicks") or 0) + 1
+        self._pending_clicks[guid] = self._pending_clicks.get(guid, 0) + 1
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush_clicks()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(REDIRECT_CLICK_FLUSH_INTERVAL)
+            await self.flush_clicks()
+
+    async def flush_clicks(self):
+        if not self._pending_clicks or self._increment_clicks is None:
+            return
+        pending, self._pending_clicks = self._pending_clicks, {}
+        guids = list(pending)
+        deltas = [pending[guid] for guid in guids]
+        try:
+            await self._increment_clicks(guids, deltas)
+            self.stats["clicks_flushed"] += sum(deltas)
+        except Exception as e:
+            self.stats["flush_errors"] += 1
+            logging.error(f"[RedirectCache] Click flush failed for {len(guids)} links: {e}")
+            # Keep the counts for the next flush
+            for guid, delta in pending.items():
+                self._pending_clicks[guid] = self._pending_clicks.get(guid, 0) + delta
+
+    def snapshot(self):
+        return {**self.stats, "size": len(self._rows), "pending_clicks": sum(self._pending_clicks.values())}
+
+
+redirect_cache = RedirectCache()
@@ -0,0 +1,94 @@
+import os
+import hmac
+import json
+import time
+import base64
+import hashlib
+import logging
+from collections import OrderedDict
+
+# 🔏 Stateless redirect tokens: "<payload>.<signature>", both base64url.
+# The payload carries the target URL, content type, expiry and click policy,
+# so /r/{token} can redirect without touching the database.
+
+REDIRECT_MODE = os.getenv("REDIRECT_MODE", "db").lower()  # "db" | "signed"
+REDIRECT_SECRET = os.getenv("REDIRECT_SECRET", "")
+REDIRECT_TOKEN_TTL_DAYS = int(os.getenv("REDIRECT_TOKEN_TTL_DAYS", "7"))
+REDIRECT_TOKEN_MAX_CLICKS = int(os.getenv("REDIRECT_TOKEN_MAX_CLICKS", "0"))  # 0 = unlimited
+REDIRECT_PERSIST_SIGNED = os.getenv("REDIRECT_PERSIST_SIGNED", "false").lower() in ("1", "true", "yes")
+
+_SIGNATURE_BYTES = 16
+_MAX_TRACKED_TOKENS = 100_000
+
+# Best-effort, per-process click counts for tokens that carry a max_clicks policy
+_token_clicks = OrderedDict()
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def _signed_mode_enabled():
+    if REDIRECT_MODE != "signed":
+        return False
+    if not REDIRECT_SECRET:
+        logging.warning("REDIRECT_MODE=signed but REDIRECT_SECRET is empty, falling back to db redirects")
+        return False
+    return True
+
+
+SIGNED_REDIRECTS = _signed_mode_enabled()
+
+
+def is_token(value: str) -> bool:
+    return "." in value
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def _sign(body: str) -> str:
+    # Tokens come from the URL, so body may hold any characters; utf-8 never fails to encode them
+    digest = hmac.new(REDIRECT_SECRET.encode(), body.encode("utf-8"), hashlib.sha256).digest()
+    return _b64encode(digest[:_SIGNATURE_BYTES])
+
+
+def sign_redirect(original_url, content_type, ttl_days=REDIRECT_TOKEN_TTL_DAYS, max_clicks=REDIRECT_TOKEN_MAX_CLICKS):
+    payload = {"u": original_url, "t": content_type, "e": int(time.time()) + ttl_days * 86400}
+    if max_clicks:
+        payload["m"] = max_clicks
+    body = _b64encode(json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+    return f"{body}.{_sign(body)}"
+
+
+def verify_redirect(token):
+    if not REDIRECT_SECRET:
+        raise InvalidToken("Signed redirects are not configured")
+    try:
+        body, signature = token.rsplit(".", 1)
+    except ValueError:
+        raise InvalidToken("Malformed token")
+    # compare_digest only takes ASCII str, so compare bytes
+    if not hmac.compare_digest(signature.encode("utf-8"), _sign(body).encode("ascii")):
+        raise InvalidToken("Bad signature")
+    try:
+        return json.loads(_b64decode(body))
+    except Exception:
+        raise InvalidToken("Malformed payload")
+
+
+def register_click(token, max_clicks):
+    """Count a click locally; returns False once the token's click limit is reached."""
+    clicks = _token_clicks.pop(token, 0)
+    if clicks >= max_clicks:
+        _token_clicks[token] = clicks
+        return False
+    _token_clicks[token] = clicks + 1
+    if len(_token_clicks) > _MAX_TRACKED_TOKENS:
+        _token_clicks.popitem(last=False)
+    return True
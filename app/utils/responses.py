@@ -0,0 +1,11 @@
+from fastapi.responses import JSONResponse
+from app.utils import fast_json
+
+# 🚀 Default response class: content goes straight to fast_json.dumps.
+# Returning it from an endpoint (rather than a plain list/dict) also skips
+# FastAPI's jsonable_encoder pass over large result lists.
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return fast_json.dumps(content)
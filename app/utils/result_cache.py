@@ -0,0 +1,116 @@
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+
+# 🧊 Upstream search result cache.
+# - keyed by normalized query params (see trip_search.py for the key builders)
+# - single-flight: concurrent identical misses share one upstream call
+# - stale-while-revalidate: expired entries are served while a refresh runs
+# Empty results are never cached.
+
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "5000"))
+RESULT_CACHE_STALE_TTL = float(os.getenv("RESULT_CACHE_STALE_TTL", "1800"))
+RESULT_CACHE_TTLS = {
+    "flight": float(os.getenv("RESULT_CACHE_TTL_FLIGHT", "600")),
+    "hotel": float(os.getenv("RESULT_CACHE_TTL_HOTEL", "900")),
+    "car": float(os.getenv("RESULT_CACHE_TTL_CAR", "300")),
+    "insurance": float(os.getenv("RESULT_CACHE_TTL_INSURANCE", "3600")),
+    "calendar": float(os.getenv("RESULT_CACHE_TTL_CALENDAR", "1800")),
+}
+DEFAULT_RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL_DEFAULT", "600"))
+
+
+def _copy_results(results):
+    # Callers decorate result dicts (redirect_url, ...), so never hand out the cached ones
+    return [dict(item) if isinstance(item, dict) else item for item in results]
+
+
+class ResultCache:
+    def __init__(self, max_size=RESULT_CACHE_SIZE, stale_ttl=RESULT_CACHE_STALE_TTL):
+        self.max_size = max_size
+        self.stale_ttl = stale_ttl
+        self.stats = {}
+        self._entries = OrderedDict()  # key -> (results, fresh_until, stale_until)
+        self._inflight = {}            # key -> Task
+        self._waiters = {}             # key -> callers awaiting the inflight task
+
+    def _count(self, kind, name):
+        kind_stats = self.stats.setdefault(kind, {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "errors": 0})
+        kind_stats[name] += 1
+
+    def _store(self, kind, key, results):
+        if not results:
+            return
+        now = time.monotonic()
+        ttl = RESULT_CACHE_TTLS.get(kind, DEFAULT_RESULT_CACHE_TTL)
+        self._entries[key] = (_copy_results(results), now + ttl, now + ttl + self.stale_ttl)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _fetch(self, kind, key, fetch):
+        task = self._inflight.get(key)
+        if task is not None:
+            self._count(kind, "coalesced")
+            return task
+
+        async def run():
+            try:
+                results = await fetch()
+                self._store(kind, key, results)
+                return results
+            except Exception:
+                self._count(kind, "errors")
+                raise
+            finally:
+                self._inflight.pop(key, None)
+
+        task = asyncio.create_task(run())
+        self._inflight[key] = task
+        return task
+
+    async def get_or_fetch(self, kind, key, fetch):
+        """fetch is a zero-arg coroutine function returning a list of results."""
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None:
+            results, fresh_until, stale_until = entry
+            if now < fresh_until:
+                self._count(kind, "hits")
+                self._entries.move_to_end(key)
+                return _copy_results(results)
+            if now < stale_until:
+                self._count(kind, "stale_hits")
+                task = self._fetch(kind, key, fetch)
+                # Nobody awaits the revalidation, so swallow its errors here
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                return _copy_results(results)
+            del self._entries[key]
+
+        self._count(kind, "misses")
+        task = self._fetch(kind, key, fetch)
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            results = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # Cancel the upstream call only once every coalesced caller has given up
+            if self._waiters.get(key) == 1 and not task.done():
+                task.cancel()
+            raise
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+        return _copy_results(results or [])
+
+    def clear(self):
+        self._entries.clear()
+        logging.info("Result cache cleared")
+
+    def snapshot(self):
+        return {"size": len(self._entries), "inflight": len(self._inflight), "by_type": self.stats}
+
+
+result_cache = ResultCache()
@@ -1,21 +1,21 @@
 
 import os
-import httpx
+from app.utils.http_client import get_client
 
 SERPAPI_KEY = os.getenv("SERPAPI_KEY")
+SERPAPI_URL = "https://serpapi.com/search.json"
 
 async def search_images_and_links(query):
-    url = "https://serpapi.com/search.json"
+    url = SERPAPI_URL
     params = {
         "q": query,
         "tbm": "isch",
         "api_key": SERPAPI_KEY
     }
 
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(url, params=params)
-        if resp.status_code == 200:
-            data = resp.json()
-            images = [img["original"] for img in data.get("images_results", [])[:5]]
-            return images
-        return []
+    resp = await get_client(url).get(url, params=params)
+    if resp.status_code == 200:
+        data = resp.json()
+        images = [img["original"] for img in data.get("images_results", [])[:5]]
+        return images
+    return []
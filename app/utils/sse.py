@@ -0,0 +1,91 @@
+import os
+import asyncio
+import logging
+from datetime import datetime
+from app.utils import fast_json
+
+# 📡 Server-Sent Events session engine.
+# One SSESession per connection owns its producer task: the stream() generator
+# starts it, and its finally-block cancels and awaits it, so nothing outlives
+# the response (normal close, producer error or client disconnect).
+# The queue is bounded, so a slow client back-pressures the producer, and
+# heartbeats are only sent after SSE_HEARTBEAT_SECONDS without any event.
+
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "64"))
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "10"))
+
+_CLOSE = object()
+
+
+# Events are encoded to bytes once here, so the server writes them as-is
+def sse_event(data, event=None) -> bytes:
+    if isinstance(data, str):
+        payload = b"".join(b"data: " + line.encode("utf-8") + b"\n" for line in data.split("\n"))
+    else:
+        # Serialized JSON never contains a raw newline, so it is always one data line
+        payload = b"data: " + fast_json.dumps(data) + b"\n"
+    if event:
+        return b"event: " + event.encode("utf-8") + b"\n" + payload + b"\n"
+    return payload + b"\n"
+
+
+class SSESession:
+    def __init__(self, producer, request=None, queue_size=SSE_QUEUE_SIZE, heartbeat=SSE_HEARTBEAT_SECONDS):
+        # producer(session) is a coroutine that calls session.send(...) and returns when done
+        self.producer = producer
+        self.request = request
+        self.heartbeat = heartbeat
+        self.closed = False
+        self._queue = asyncio.Queue(maxsize=queue_size)
+
+    async def send(self, data, event=None):
+        if self.closed:
+            return
+        await self._queue.put(sse_event(data, event))
+
+    async def close(self, reason="end"):
+        if self.closed:
+            return
+        await self._queue.put(sse_event(reason, event="close"))
+        self.closed = True
+        await self._queue.put(_CLOSE)
+
+    async def _run_producer(self):
+        try:
+            await self.producer(self)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.exception("SSE producer failed")
+            await self.send(f"❌ Error: {e}")
+            await self.close("error")
+        finally:
+            if not self.closed:
+                await self.close()
+
+    async def _disconnected(self):
+        if self.request is None:
+            return False
+        try:
+            return await self.request.is_disconnected()
+        except Exception:
+            return True
+
+    async def stream(self):
+        producer_task = asyncio.create_task(self._run_producer())
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout=self.heartbeat)
+                except asyncio.TimeoutError:
+                    if await self._disconnected():
+                        break
+                    yield sse_event(f"🟢 keep-alive {datetime.utcnow().isoformat()}")
+                    continue
+                if item is _CLOSE:
+                    break
+                yield item
+        finally:
+            self.closed = True
+            producer_task.cancel()
+            await asyncio.gather(producer_task, return_exceptions=True)
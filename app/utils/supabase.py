@@ -1,21 +1,7 @@
-from supabase import create_client
-import os
-from dotenv import load_dotenv
+from app.utils.db import db
+from app.utils.affiliates import affiliate_registry
 
-load_dotenv()
-
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+affiliate_registry.register_loader(db.list_affiliates)
 
 async def get_affiliates_by_type_and_priority(affiliate_type: str):
-    try:
-        response = supabase.table("affiliate_templates") \
-            .select("*") \
-            .eq("type", affiliate_type) \
-            .order("priority", desc=False) \
-            .execute()
-        return response.data or []
-    except Exception as e:
-        print(f"Error fetching affiliates: {e}")
-        return []
+    return await affiliate_registry.get(affiliate_type)
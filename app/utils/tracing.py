@@ -0,0 +1,190 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import contextvars
+from contextlib import contextmanager
+import httpx
+from app.utils.write_behind import write_behind
+
+# 🧵 Lightweight request tracing.
+# TracingMiddleware opens a root span per request and decides head-based sampling
+# (TRACE_SAMPLE_RATE, or the flag of an incoming W3C traceparent header). span()
+# nests under the current span through a contextvar, so tasks started inside a
+# request inherit it. Outbound calls through the shared httpx clients get their own
+# span and carry traceparent, which links the /search/* loopback calls of
+# api_gateway.py into the same trace. Finished spans of sampled traces go through
+# the write-behind queue to TRACE_EXPORT: "stdout" or a file path, one JSON span per line.
+
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+TRACE_EXPORT = os.getenv("TRACE_EXPORT", "stdout")
+
+_current = contextvars.ContextVar("trace_span", default=None)
+
+
+def _new_id(bits):
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "sampled", "attrs", "started_at", "_started", "error")
+
+    def __init__(self, name, trace_id, parent_id, sampled, attrs=None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attrs = attrs or {}
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.error = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def traceparent(self):
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def finish(self):
+        if not self.sampled:
+            return
+        write_behind.put("trace", "spans", {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.started_at,
+            "duration_ms": round((time.perf_counter() - self._started) * 1000, 3),
+            "attrs": self.attrs,
+            "error": self.error,
+        })
+
+
+def current_span():
+    return _current.get()
+
+
+@contextmanager
+def _activate(span):
+    token = _current.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current.reset(token)
+        span.finish()
+
+
+@contextmanager
+def span(name, **attrs):
+    """Child span of the current one; a no-op (yields None) outside a sampled trace."""
+    parent = _current.get()
+    if parent is None or not parent.sampled:
+        yield None
+        return
+    with _activate(Span(name, parent.trace_id, parent.span_id, True, attrs)) as child:
+        yield child
+
+
+@contextmanager
+def detached_span(name, **attrs):
+    """Like span() but never becomes the current span: for async generators, which
+    may be resumed or closed from another context than the one they started in."""
+    parent = _current.get()
+    if parent is None or not parent.sampled:
+        yield None
+        return
+    child = Span(name, parent.trace_id, parent.span_id, True, attrs)
+    try:
+        yield child
+    except BaseException as e:
+        child.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        child.finish()
+
+
+def _parse_traceparent(value):
+    # 00-<32 hex trace id>-<16 hex parent span id>-<flags>
+    parts = (value or "").strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    return parts[1], parts[2], parts[3] == "01"
+
+
+def start_trace(name, traceparent=None, **attrs):
+    """Root (or remote-continued) span; sampled per TRACE_SAMPLE_RATE unless the caller decided."""
+    remote = _parse_traceparent(traceparent)
+    if remote:
+        trace_id, parent_id, sampled = remote
+    else:
+        trace_id, parent_id = _new_id(128), None
+        sampled = TRACE_SAMPLE_RATE > 0 and random.random() < TRACE_SAMPLE_RATE
+    return _activate(Span(name, trace_id, parent_id, sampled, attrs))
+
+
+class TracingMiddleware:
+    """Pure ASGI middleware, so streamed responses stay inside the root span."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        traceparent = None
+        for key, value in scope.get("headers", []):
+            if key == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+        with start_trace(f"{scope['method']} {scope['path']}", traceparent) as root:
+            async def send_with_status(message):
+                if message["type"] == "http.response.start":
+                    root.set(status=message["status"])
+                await send(message)
+
+            await self.app(scope, receive, send_with_status if root.sampled else send)
+
+
+class TracingTransport(httpx.AsyncBaseTransport):
+    """Wraps an httpx transport: one span per outbound request plus traceparent propagation."""
+
+    def __init__(self, transport):
+        self._transport = transport
+
+    async def handle_async_request(self, request):
+        parent = _current.get()
+        if parent is None:
+            return await self._transport.handle_async_request(request)
+        with span(f"http {request.method} {request.url.host}", path=request.url.path) as child:
+            request.headers["traceparent"] = (child or parent).traceparent()
+            response = await self._transport.handle_async_request(request)
+            if child:
+                child.set(status=response.status_code)
+            return response
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+# 📤 Exporter behind the write-behind queue
+def _append(path, lines):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(lines)
+
+
+async def _export(target, records):
+    lines = "".join(json.dumps(record, ensure_ascii=False, default=str) + "\n" for record in records)
+    if TRACE_EXPORT == "stdout":
+        sys.stdout.write(lines)
+        sys.stdout.flush()
+    else:
+        await asyncio.to_thread(_append, TRACE_EXPORT, lines)
+
+
+write_behind.register_sink("trace", _export)
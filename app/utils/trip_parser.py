@@ -0,0 +1,442 @@
+import os
+import re
+from datetime import date, timedelta
+
+# 🧭 Rule-based trip extraction that runs before the LLM.
+# Understands IATA codes, common city names (English + Hebrew, including the
+# attached מ/ל/ב prefixes), ISO / dd.mm.yyyy / month-name / relative dates and
+# passenger counts. Returns the same dict shape as extract_trip_info plus a
+# "confidence" score; the LLM is only called when confidence is below
+# TRIP_PARSER_MIN_CONFIDENCE. Messages the rules can't read unambiguously
+# (competing places, negations or alternatives, a return before the departure,
+# a weekday that contradicts the dates) are capped below any sensible threshold.
+
+TRIP_PARSER_ENABLED = os.getenv("TRIP_PARSER_ENABLED", "true").lower() in ("1", "true", "yes")
+TRIP_PARSER_MIN_CONFIDENCE = float(os.getenv("TRIP_PARSER_MIN_CONFIDENCE", "0.8"))
+# Messages with more unparsed words than this probably carry details only the LLM can read
+TRIP_PARSER_MAX_LEFTOVER_WORDS = int(os.getenv("TRIP_PARSER_MAX_LEFTOVER_WORDS", "6"))
+
+# English city name -> aliases (lowercase English and Hebrew spellings)
+CITIES = {
+    "Tel Aviv": ["tel aviv", "tel-aviv", "תל אביב", "תל-אביב", "ת\"א"],
+    "Eilat": ["eilat", "אילת"],
+    "London": ["london", "לונדון"],
+    "Milan": ["milan", "milano", "מילאנו", "מילנו"],
+    "Rome": ["rome", "roma", "רומא"],
+    "Paris": ["paris", "פריז"],
+    "Barcelona": ["barcelona", "ברצלונה"],
+    "Madrid": ["madrid", "מדריד"],
+    "Amsterdam": ["amsterdam", "אמסטרדם"],
+    "Berlin": ["berlin", "ברלין"],
+    "Munich": ["munich", "מינכן"],
+    "Vienna": ["vienna", "וינה"],
+    "Prague": ["prague", "פראג"],
+    "Budapest": ["budapest", "בודפשט"],
+    "Athens": ["athens", "אתונה"],
+    "Larnaca": ["larnaca", "לרנקה"],
+    "Paphos": ["paphos", "פאפוס"],
+    "Lisbon": ["lisbon", "ליסבון"],
+    "Venice": ["venice", "ונציה"],
+    "Naples": ["naples", "נאפולי"],
+    "Florence": ["florence", "פירנצה"],
+    "Nice": ["ניס"],  # English "nice" is too common a word to match
+    "Zurich": ["zurich", "ציריך"],
+    "Geneva": ["geneva", "ז'נבה"],
+    "Istanbul": ["istanbul", "איסטנבול"],
+    "Dubai": ["dubai", "דובאי"],
+    "New York": ["new york", "nyc", "ניו יורק"],
+    "Bangkok": ["bangkok", "בנגקוק"],
+    "Bucharest": ["bucharest", "בוקרשט"],
+    "Warsaw": ["warsaw", "ורשה"],
+    "Krakow": ["krakow", "קרקוב"],
+    "Tbilisi": ["tbilisi", "טביליסי"],
+    "Batumi": ["batumi", "בטומי"],
+    "Rhodes": ["rhodes", "רודוס"],
+    "Crete": ["crete", "כרתים"],
+    "Thessaloniki": ["thessaloniki", "סלוניקי"],
+}
+
+KNOWN_IATA = {
+    "TLV", "ETM", "LON", "LHR", "LGW", "STN", "LTN", "MIL", "MXP", "LIN", "BGY", "ROM", "FCO", "CIA",
+    "PAR", "CDG", "ORY", "BCN", "MAD", "AMS", "BER", "MUC", "FRA", "VIE", "PRG", "BUD", "ATH", "LCA",
+    "PFO", "LIS", "OPO", "VCE", "NAP", "FLR", "NCE", "ZRH", "GVA", "IST", "SAW", "DXB", "NYC", "JFK",
+    "EWR", "LAX", "MIA", "SFO", "BKK", "HKT", "OTP", "WAW", "KRK", "TBS", "BUS", "RHO", "HER", "SKG",
+    "BRU", "CPH", "ARN", "OSL", "HEL", "DUB", "MAN", "EDI", "BLQ", "PMI", "AGP", "DBV", "SPU", "SOF",
+}
+_NOT_IATA = {"AND", "THE", "FOR", "USD", "EUR", "ILS", "NIS", "GBP", "YES", "ANY", "ALL", "VIP", "PAX", "BUT", "NOT"}
+
+MONTHS = {
+    "jan": 1, "january": 1, "ינואר": 1,
+    "feb": 2, "february": 2, "פברואר": 2,
+    "mar": 3, "march": 3, "מרץ": 3, "מרס": 3,
+    "apr": 4, "april": 4, "אפריל": 4,
+    "may": 5, "מאי": 5,
+    "jun": 6, "june": 6, "יוני": 6,
+    "jul": 7, "july": 7, "יולי": 7,
+    "aug": 8, "august": 8, "אוגוסט": 8,
+    "sep": 9, "sept": 9, "september": 9, "ספטמבר": 9,
+    "oct": 10, "october": 10, "אוקטובר": 10,
+    "nov": 11, "november": 11, "נובמבר": 11,
+    "dec": 12, "december": 12, "דצמבר": 12,
+}
+
+NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "אחד": 1, "אחת": 1, "שני": 2, "שתי": 2, "שניים": 2, "שתיים": 2, "שלושה": 3, "שלוש": 3,
+    "ארבעה": 4, "ארבע": 4, "חמישה": 5, "חמש": 5,
+}
+
+TYPE_KEYWORDS = {
+    "flight": ["flight", "flights", "fly", "plane", "טיסה", "טיסות", "לטוס", "כרטיס טיסה"],
+    "hotel": ["hotel", "hotels", "stay", "accommodation", "מלון", "מלונות", "לינה"],
+    "car": ["car", "rental car", "rent a car", "רכב", "רכב שכור", "השכרת רכב"],
+}
+
+_ORIGIN_HINTS = {"from"}
+_DESTINATION_HINTS = {"to", "in", "into", "at", "for"}
+_HEBREW_PREFIXES = "ומלב"
+_FILLER_WORDS = {
+    "i", "we", "a", "an", "the", "to", "from", "in", "on", "at", "for", "and", "with", "me", "my", "us",
+    "need", "want", "looking", "find", "book", "please", "trip", "return", "back", "until", "till",
+    "between", "adult", "adults", "child", "children", "kids", "kid", "people", "persons", "pax",
+    "nights", "night", "round", "one", "way", "ticket", "tickets",
+    "אני", "אנחנו", "צריך", "צריכה", "רוצה", "רוצים", "מחפש", "מחפשת", "עם", "בין", "עד", "של", "את",
+    "מבוגרים", "מבוגר", "ילדים", "ילד", "אנשים", "לילות", "הלוך", "חזור", "ושוב", "בבקשה",
+}
+
+_ALIASES = sorted(
+    ((alias, city) for city, aliases in CITIES.items() for alias in aliases),
+    key=lambda pair: -len(pair[0])
+)
+_ALIAS_TO_CITY = dict(_ALIASES)
+_PLACE_RE = re.compile(
+    r"(?<![\w\"'])(?P<prefix>[" + _HEBREW_PREFIXES + r"]{0,2}-?)(?P<place>"
+    + "|".join(re.escape(alias) for alias, _ in _ALIASES) + r")(?![\w])"
+)
+_IATA_RE = re.compile(r"(?<![A-Za-z])(?P<prefix>[" + _HEBREW_PREFIXES + r"]{0,2}-?)(?P<code>[A-Z]{3})(?![A-Za-z])")
+_MONTH_NAMES = "|".join(sorted(MONTHS, key=len, reverse=True))
+_ISO_DATE_RE = re.compile(r"(?<!\d)(\d{4})-(\d{1,2})-(\d{1,2})(?!\d)")
+_NUMERIC_DATE_RE = re.compile(r"(?<![\d-])(\d{1,2})[./](\d{1,2})(?:[./](\d{2,4}))?(?![\d-])")
+_DAY_RANGE_MONTH_RE = re.compile(
+    r"(?<!\d)(\d{1,2})\s*(?:-|–|to|until|עד|ל-?|ו-?)\s*(\d{1,2})\s+(?:ב|ל)?(" + _MONTH_NAMES + r")\b\.?(?:,?\s+(\d{4}))?"
+)
+_DAY_MONTH_RE = re.compile(r"(?<!\d)(\d{1,2})(?:st|nd|rd|th)?\s+(?:of\s+)?(?:ב|ל)?(" + _MONTH_NAMES + r")\b\.?(?:,?\s+(\d{4}))?")
+_MONTH_DAY_RE = re.compile(r"\b(" + _MONTH_NAMES + r")\.?\s+(\d{1,2})(?:st|nd|rd|th)?(?!\d)(?:,?\s+(\d{4}))?")
+_NIGHTS_RE = re.compile(r"(\d{1,2}|" + "|".join(NUMBER_WORDS) + r")\s+(?:nights?|לילות)")
+_COUNT = r"(\d{1,2}|" + "|".join(NUMBER_WORDS) + r")"
+_ADULTS_RE = re.compile(_COUNT + r"\s+(?:adults?|people|persons|pax|travellers|travelers|מבוגרים|אנשים|נוסעים)")
+_CHILDREN_RE = re.compile(_COUNT + r"\s+(?:children|child|kids?|ילדים|ילד)")
+_WORD_RE = re.compile(r"[^\W\d_]+")
+# "not Paris", "don't", "or maybe", "instead" - the message changes or excludes something
+_NEGATION_RE = re.compile(r"\b(?:not|no|never|or|instead|rather|except|unless)\b|n't\b|(?<!\w)(?:לא|או|במקום|אלא|בלי)(?!\w)")
+WEEKDAYS = {
+    "monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3, "friday": 4, "saturday": 5, "sunday": 6,
+    "יום שני": 0, "יום שלישי": 1, "יום רביעי": 2, "יום חמישי": 3, "יום שישי": 4, "שבת": 5, "יום ראשון": 6,
+}
+_WEEKDAY_RE = re.compile(r"(?<!\w)[" + _HEBREW_PREFIXES + r"]?(" + "|".join(WEEKDAYS) + r")(?!\w)")
+# Confidence of a parse that looked complete but is ambiguous
+_AMBIGUOUS_CONFIDENCE = 0.4
+
+
+def _count(value):
+    return int(value) if value.isdigit() else NUMBER_WORDS.get(value, 0)
+
+
+def _future_date(today, month, day, year=None):
+    if year:
+        return date(int(year), month, day)
+    candidate = date(today.year, month, day)
+    return candidate if candidate >= today else date(today.year + 1, month, day)
+
+
+class _Scan:
+    def __init__(self, text):
+        self.text = text
+        self.lower = text.lower()
+        self.consumed = []
+
+    def take(self, match):
+        self.consumed.append(match.span())
+
+    def is_free(self, match):
+        start, end = match.span()
+        return all(end <= s or start >= e for s, e in self.consumed)
+
+    def leftover_words(self):
+        chars = list(self.lower)
+        for start, end in self.consumed:
+            chars[start:end] = " " * (end - start)
+        return [w for w in _WORD_RE.findall("".join(chars)) if w not in _FILLER_WORDS and len(w) > 1]
+
+
+def _role_hint(scan, match, prefix):
+    prefix = prefix.rstrip("-")
+    if prefix.endswith("מ"):
+        return "origin"
+    if prefix.endswith(("ל", "ב")):
+        return "destination"
+    before = scan.lower[:match.start()].split()
+    if before:
+        word = before[-1]
+        if word in _ORIGIN_HINTS:
+            return "origin"
+        if word in _DESTINATION_HINTS:
+            return "destination"
+    return None
+
+
+def _find_places(scan):
+    places = []
+    for match in _PLACE_RE.finditer(scan.lower):
+        prefix = match.group("prefix")
+        # Only Hebrew names take a Hebrew prefix
+        if prefix and match.group("place").isascii():
+            continue
+        places.append((match.start(), _ALIAS_TO_CITY[match.group("place")], _role_hint(scan, match, prefix), True))
+        scan.take(match)
+    for match in _IATA_RE.finditer(scan.text):
+        code = match.group("code")
+        if code in _NOT_IATA or not scan.is_free(match):
+            continue
+        places.append((match.start(), code, _role_hint(scan, match, match.group("prefix")), code in KNOWN_IATA))
+        scan.take(match)
+    return sorted(places)
+
+
+def _competing_places(places):
+    # Two different places named for the same role ("to Rome ... to Athens"), or more than two places
+    names = {name for _, name, _, _ in places}
+    for role in ("origin", "destination"):
+        if len({name for _, name, hint, _ in places if hint == role}) > 1:
+            return True
+    return len(names) > 2
+
+
+def _weekday_conflict(scan, dates):
+    # "next weekend but leaving thursday": a named weekday none of the dates falls on
+    weekdays = {WEEKDAYS[match.group(1)] for match in _WEEKDAY_RE.finditer(scan.lower)}
+    return bool(weekdays) and not weekdays & {value.weekday() for value in dates}
+
+
+def _ambiguities(scan, places, dates, start, end):
+    reasons = []
+    if _competing_places(places):
+        reasons.append("places")
+    if _NEGATION_RE.search(scan.lower):
+        reasons.append("negation")
+    if start and end and end < start:
+        reasons.append("dates")
+    if _weekday_conflict(scan, dates):
+        reasons.append("weekday")
+    return reasons
+
+
+def _assign_places(places):
+    origin = next((name for _, name, role, _ in places if role == "origin"), None)
+    destination = next((name for _, name, role, _ in places if role == "destination"), None)
+    unassigned = [name for _, name, role, _ in places if role is None and name not in (origin, destination)]
+    if destination is None and unassigned:
+        # "TLV MXP" / "TLV - MXP": the last unnamed place is where they are going
+        destination = unassigned.pop()
+    if origin is None and unassigned:
+        origin = unassigned.pop(0)
+    return origin, destination
+
+
+def _find_dates(scan, today):
+    found = []
+
+    for match in _ISO_DATE_RE.finditer(scan.lower):
+        try:
+            found.append((match.start(), date(int(match.group(1)), int(match.group(2)), int(match.group(3)))))
+            scan.take(match)
+        except ValueError:
+            continue
+
+    for match in _DAY_RANGE_MONTH_RE.finditer(scan.lower):
+        if not scan.is_free(match):
+            continue
+        month, year = MONTHS[match.group(3)], match.group(4)
+        try:
+            start = _future_date(today, month, int(match.group(1)), year)
+            end = date(start.year, month, int(match.group(2)))
+        except ValueError:
+            continue
+        found += [(match.start(), start), (match.start() + 1, end)]
+        scan.take(match)
+
+    for regex, day_group, month_group in ((_DAY_MONTH_RE, 1, 2), (_MONTH_DAY_RE, 2, 1)):
+        for match in regex.finditer(scan.lower):
+            if not scan.is_free(match):
+                continue
+            try:
+                found.append((match.start(), _future_date(
+                    today, MONTHS[match.group(month_group)], int(match.group(day_group)), match.group(3)
+                )))
+                scan.take(match)
+            except ValueError:
+                continue
+
+    for match in _NUMERIC_DATE_RE.finditer(scan.lower):
+        if not scan.is_free(match):
+            continue
+        day, month, year = int(match.group(1)), int(match.group(2)), match.group(3)
+        if year and len(year) == 2:
+            year = f"20{year}"
+        try:
+            found.append((match.start(), _future_date(today, month, day, year)))
+            scan.take(match)
+        except ValueError:
+            continue
+
+    dates = [value for _, value in sorted(found)]
+    if not dates:
+        dates = _relative_dates(scan, today)
+    return dates
+
+
+def _relative_dates(scan, today):
+    text = scan.lower
+
+    def mark(phrase):
+        start = text.find(phrase)
+        scan.consumed.append((start, start + len(phrase)))
+
+    # Weekend = Friday to Sunday
+    for phrase in ("next weekend", "סוף השבוע הבא", "סופ\"ש הבא", "בסופ\"ש הבא"):
+        if phrase in text:
+            mark(phrase)
+            friday = today + timedelta(days=(4 - today.weekday()) % 7 + 7)
+            return [friday, friday + timedelta(days=2)]
+    for phrase in ("this weekend", "סוף השבוע", "סופ\"ש", "בסופ\"ש"):
+        if phrase in text:
+            mark(phrase)
+            friday = today + timedelta(days=(4 - today.weekday()) % 7)
+            return [friday, friday + timedelta(days=2)]
+    for phrase in ("next week", "שבוע הבא", "בשבוע הבא"):
+        if phrase in text:
+            mark(phrase)
+            monday = today + timedelta(days=7 - today.weekday())
+            return [monday, monday + timedelta(days=6)]
+    for phrase in ("day after tomorrow", "מחרתיים"):
+        if phrase in text:
+            mark(phrase)
+            return [today + timedelta(days=2)]
+    for phrase in ("tomorrow", "מחר"):
+        if phrase in text:
+            mark(phrase)
+            return [today + timedelta(days=1)]
+    for phrase in ("today", "tonight", "היום", "הלילה"):
+        if phrase in text:
+            mark(phrase)
+            return [today]
+    match = re.search(r"in (\d{1,2}) days", text)
+    if match:
+        scan.take(match)
+        return [today + timedelta(days=int(match.group(1)))]
+    return []
+
+
+def _find_passengers(scan):
+    adults, children = None, 0
+    match = _ADULTS_RE.search(scan.lower)
+    if match:
+        adults = _count(match.group(1))
+        scan.take(match)
+    match = _CHILDREN_RE.search(scan.lower)
+    if match:
+        children = _count(match.group(1))
+        scan.take(match)
+    if adults is None:
+        if re.search(r"\b(couple|two of us)\b|זוג", scan.lower):
+            adults = 2
+        elif re.search(r"\b(solo|alone|just me)\b|יחיד|לבד", scan.lower):
+            adults = 1
+    return adults, children
+
+
+def _find_types(text):
+    types = []
+    for trip_type, keywords in TYPE_KEYWORDS.items():
+        if any(re.search(r"(?<!\w)[" + _HEBREW_PREFIXES + r"]?" + re.escape(k) + r"(?!\w)", text) for k in keywords):
+            types.append(trip_type)
+    return types
+
+
+def parse_trip_message(message, prefs=None, today=None):
+    prefs = prefs or {}
+    today = today or date.today()
+    scan = _Scan(message or "")
+
+    places = _find_places(scan)
+    origin, destination = _assign_places(places)
+    dates = _find_dates(scan, today)
+    adults, children = _find_passengers(scan)
+    types = _find_types(scan.lower)
+
+    start = dates[0] if dates else None
+    end = dates[1] if len(dates) > 1 else None
+    nights = _NIGHTS_RE.search(scan.lower)
+    if nights:
+        scan.take(nights)
+        if start and not end:
+            end = start + timedelta(days=_count(nights.group(1)))
+
+    info = {
+        "complete": False,
+        "type": types or ["flight", "hotel"],
+        "origin": origin,
+        "destination": destination,
+        "dates": {"start": start.isoformat() if start else None, "end": end.isoformat() if end else None},
+        "adults": adults or prefs.get("adults") or 1,
+        "children": children,
+        "updated_prefs": {},
+        "follow_up": "",
+        "missing_fields": [],
+    }
+
+    confidence = 0.0
+    if destination:
+        confidence += 0.35
+    if start:
+        confidence += 0.3
+    if origin:
+        confidence += 0.15
+    elif prefs.get("home_city") and destination:
+        info["origin"] = prefs["home_city"]
+        info["updated_prefs"]["origin_inferred"] = True
+        confidence += 0.15
+    if end:
+        confidence += 0.1
+    if types:
+        confidence += 0.1
+    if any(not known for _, _, _, known in places):
+        confidence -= 0.1
+    if start and start < today:
+        confidence -= 0.3
+    if len(places) > 2 or len(dates) > 2:
+        confidence -= 0.2
+    if len(scan.leftover_words()) > TRIP_PARSER_MAX_LEFTOVER_WORDS:
+        confidence *= 0.5
+    if _ambiguities(scan, places, dates, start, end):
+        confidence = min(confidence, _AMBIGUOUS_CONFIDENCE)
+
+    for field, value in (("origin", info["origin"]), ("destination", destination), ("dates.start", start)):
+        if not value:
+            info["missing_fields"].append(field)
+    info["complete"] = not info["missing_fields"]
+    if not info["complete"]:
+        info["follow_up"] = "Can you clarify your travel destination or dates?"
+
+    info["confidence"] = round(max(0.0, min(confidence, 1.0)), 2)
+    return info
+
+
+def fast_path_trip_info(message, prefs=None):
+    """Return parsed trip info when the rule-based parse is confident enough, else None."""
+    if not TRIP_PARSER_ENABLED:
+        return None
+    info = parse_trip_message(message, prefs)
+    if info["complete"] and info["confidence"] >= TRIP_PARSER_MIN_CONFIDENCE:
+        return info
+    return None
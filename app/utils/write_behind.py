@@ -0,0 +1,126 @@
+import os
+import asyncio
+import logging
+from collections import deque
+
+# 📨 Write-behind queue for log-style writes (search logs, redirects, ELK events).
+# Request handlers only append to an in-memory buffer; a background task
+# flushes it in batches, grouped by sink and target, through async sink writers.
+# Targets marked durable (rows something else depends on, like redirects) are
+# never dropped when the buffer is full, and a failed write of them is retried on
+# the next flushes, up to WRITE_BEHIND_MAX_RETRIES times.
+
+WRITE_BEHIND_MAX_SIZE = int(os.getenv("WRITE_BEHIND_MAX_SIZE", "10000"))
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "200"))
+WRITE_BEHIND_FLUSH_INTERVAL = float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", "1.0"))
+WRITE_BEHIND_MAX_RETRIES = int(os.getenv("WRITE_BEHIND_MAX_RETRIES", "5"))
+
+
+class WriteBehindQueue:
+    def __init__(self, max_size=WRITE_BEHIND_MAX_SIZE, batch_size=WRITE_BEHIND_BATCH_SIZE,
+                 flush_interval=WRITE_BEHIND_FLUSH_INTERVAL, max_retries=WRITE_BEHIND_MAX_RETRIES):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.stats = {"enqueued": 0, "flushed": 0, "dropped": 0, "failed": 0, "batches": 0, "retried": 0}
+        self._buffer = deque()
+        self._retry = []    # (sink, target, records, attempts) of failed durable writes
+        self._durable = set()
+        self._sinks = {}
+        self._wakeup = None
+        self._task = None
+        self._stopping = False
+
+    def register_sink(self, name, writer):
+        # writer(target, records) is a coroutine function
+        self._sinks[name] = writer
+
+    def make_durable(self, sink, target):
+        self._durable.add((sink, target))
+
+    def put(self, sink, target, record):
+        if len(self._buffer) >= self.max_size and (sink, target) not in self._durable:
+            self.stats["dropped"] += 1
+            return False
+        self._buffer.append((sink, target, record))
+        self.stats["enqueued"] += 1
+        if self._wakeup is not None and len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def snapshot(self):
+        return {**self.stats, "pending": len(self._buffer) + sum(len(item[2]) for item in self._retry)}
+
+    async def start(self):
+        if self._task is not None:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            # Let the loop finish the batch it is writing rather than cancelling it mid-write
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        # Drain everything still buffered before shutdown, retrying durable writes while they have attempts left
+        await self.flush()
+        while self._retry:
+            await self.flush()
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logging.error(f"[WriteBehind] Flush loop error: {e}")
+
+    async def flush(self):
+        retry, self._retry = self._retry, []
+        for sink, target, records, attempts in retry:
+            self.stats["retried"] += len(records)
+            await self._write_group(sink, target, records, attempts)
+        while self._buffer:
+            batch = []
+            while self._buffer and len(batch) < self.batch_size:
+                batch.append(self._buffer.popleft())
+            await self._write_batch(batch)
+
+    async def _write_batch(self, batch):
+        # PostgREST bulk inserts need identical keys per row, so group on them too
+        groups = {}
+        for sink, target, record in batch:
+            key = (sink, target, tuple(sorted(record)))
+            groups.setdefault(key, []).append(record)
+
+        for (sink, target, _), records in groups.items():
+            await self._write_group(sink, target, records)
+
+    async def _write_group(self, sink, target, records, attempts=0):
+        writer = self._sinks.get(sink)
+        if writer is None:
+            logging.error(f"[WriteBehind] No sink registered for '{sink}', dropping {len(records)} records")
+            self.stats["failed"] += len(records)
+            return
+        try:
+            await writer(target, records)
+            self.stats["flushed"] += len(records)
+            self.stats["batches"] += 1
+        except Exception as e:
+            if (sink, target) in self._durable and attempts < self.max_retries:
+                logging.warning(f"[WriteBehind] {sink}:{target} bulk write of {len(records)} failed, will retry: {e}")
+                self._retry.append((sink, target, records, attempts + 1))
+                return
+            self.stats["failed"] += len(records)
+            logging.error(f"[WriteBehind] {sink}:{target} bulk write of {len(records)} failed: {e}")
+
+
+write_behind = WriteBehindQueue()
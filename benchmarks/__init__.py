@@ -0,0 +1 @@
+# Package initializer
\ No newline at end of file
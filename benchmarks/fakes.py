@@ -0,0 +1,348 @@
+"""Local stand-ins for every upstream the app talks to, with latency and error injection.
+
+    python -m benchmarks.fakes --base-port 9100 --latency travelpayouts=0.15 --errors hotellook=0.05
+
+Serves Travelpayouts v1/v2, Hotellook cache.json, Sky-Scrapper, the Supabase
+REST API (backed by app.utils.db.MemoryBackend), Elasticsearch _bulk and an
+OpenAI-compatible chat completions endpoint, each on its own port
+(base-port + offset in UPSTREAMS). upstream_env() gives the environment that
+points the app at them.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+import time
+from datetime import date, timedelta
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from app.utils.db import MemoryBackend
+
+# name -> port offset from --base-port
+UPSTREAMS = {
+    "travelpayouts": 0,
+    "hotellook": 1,
+    "skyscrapper": 2,
+    "supabase": 3,
+    "elastic": 4,
+    "llm": 5,
+}
+
+CITIES = ["Milan", "Rome", "Paris", "Barcelona", "Madrid", "Amsterdam", "Berlin", "Vienna", "Prague", "Athens"]
+
+
+class Fault:
+    """Latency (fixed + exponential jitter) and error-rate injection for one upstream."""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.stats = {"requests": 0, "errors": 0}
+
+    async def delay(self):
+        seconds = self.latency + (random.expovariate(1 / self.jitter) if self.jitter else 0.0)
+        if seconds:
+            await asyncio.sleep(seconds)
+
+    def fail(self):
+        self.stats["requests"] += 1
+        if self.error_rate and random.random() < self.error_rate:
+            self.stats["errors"] += 1
+            return True
+        return False
+
+
+def _injected(fault, handler):
+    async def endpoint(request: Request):
+        await fault.delay()
+        if fault.fail():
+            return JSONResponse({"error": "injected failure"}, status_code=503)
+        return await handler(request)
+    return endpoint
+
+
+def _app(fault, routes):
+    async def stats(request):
+        return JSONResponse(fault.stats)
+    return Starlette(routes=[
+        Route(path, _injected(fault, handler), methods=methods) for path, handler, methods in routes
+    ] + [Route("/__stats", stats)])
+
+
+# ✈️ Travelpayouts
+def travelpayouts_app(fault):
+    async def cheap(request):
+        origin = request.query_params.get("origin", "LON")
+        destination = request.query_params.get("destination", "MIL")
+        depart = request.query_params.get("depart_date") or date.today().strftime("%Y-%m")
+        offers = {
+            str(i): {
+                "price": 80 + i * 15, "airline": "FR", "flight_number": 1000 + i,
+                "departure_at": f"{depart}-1{i}T08:00:00Z", "return_at": f"{depart}-2{i}T18:00:00Z"
+            }
+            for i in range(3)
+        }
+        return JSONResponse({"success": True, "currency": "USD", "data": {destination: offers}, "origin": origin})
+
+    async def latest(request):
+        flights = [
+            {"origin": "LON", "destination": city[:3].upper(), "price": 60 + i * 10,
+             "depart_date": (date.today() + timedelta(days=30 + i)).isoformat(), "link": f"/search/LON{i}"}
+            for i, city in enumerate(CITIES)
+        ]
+        return JSONResponse({"success": True, "currency": "USD", "data": flights})
+
+    async def calendar(request):
+        origin = request.query_params.get("origin", "LON")
+        destination = request.query_params.get("destination", "MIL")
+        year, month = map(int, (request.query_params.get("depart_date") or date.today().strftime("%Y-%m")).split("-"))
+        first = date(year, month, 1)
+        days = [first + timedelta(days=i) for i in range(31) if (first + timedelta(days=i)).month == month]
+        offers = {
+            day.isoformat(): {
+                "origin": origin, "destination": destination, "price": 70 + (day.day * 37) % 90,
+                "airline": "FR", "flight_number": 2000 + day.day, "departure_at": f"{day.isoformat()}T07:30:00Z"
+            }
+            for day in days
+        }
+        return JSONResponse({"success": True, "currency": "USD", "data": offers})
+
+    return _app(fault, [
+        ("/v1/prices/cheap", cheap, ["GET"]),
+        ("/v1/prices/calendar", calendar, ["GET"]),
+        ("/v2/prices/latest", latest, ["GET"]),
+    ])
+
+
+# 🏨 Hotellook
+def hotellook_app(fault):
+    async def cache(request):
+        location = request.query_params.get("location", "Milan")
+        limit = int(request.query_params.get("limit", 10))
+        hotels = [
+            {"hotelId": 1000 + i, "hotelName": f"{location} Hotel {i}", "stars": 3 + i % 3,
+             "priceFrom": 90 + i * 20, "priceAvg": 110 + i * 20, "location": {"name": location}}
+            for i in range(limit)
+        ]
+        return JSONResponse(hotels)
+
+    return _app(fault, [("/api/v2/cache.json", cache, ["GET"])])
+
+
+# 🚗 Sky-Scrapper
+def skyscrapper_app(fault):
+    async def cars(request):
+        quotes = [
+            {"tot_price": 150.0 + i * 25, "currency": "EUR", "sipp": f"CDMR{i}",
+             "loc": {"pu": "PU", "do": "DO"}, "deeplink": f"https://cars.example/deal/{i}"}
+            for i in range(5)
+        ]
+        return JSONResponse({"status": True, "data": {"quotes": quotes}})
+
+    return _app(fault, [("/api/v1/cars/searchCars", cars, ["GET"])])
+
+
+# 🗄️ Supabase (PostgREST)
+def seed_tables(redirects=1000, users=1000):
+    affiliates = [
+        {"type": "flight", "provider_name": "travelpayouts", "provider_url": "v1", "api_key": "bench", "priority": 1},
+        {"type": "flight", "provider_name": "travelpayouts-latest", "provider_url": "v2", "api_key": "bench", "priority": 2},
+        {"type": "hotel", "provider_name": "hotellook", "priority": 1},
+        {"type": "car", "provider_name": "sky-scrapper", "priority": 1},
+        {"type": "insurance", "provider_name": "bench-insurance", "priority": 1,
+         "template_url": "https://insurance.example/quote?to={destination}&from={start}&until={end}"},
+        {"type": "esim", "provider_name": "airalo", "priority": 1,
+         "template_url": "https://www.airalo.com/?irclickid=bench"},
+    ]
+    return {
+        "affiliate_templates": affiliates,
+        "redirects": [
+            {"guid": f"bench-{i}", "original_url": f"https://www.aviasales.com/search/LON{i}", "type": "flight",
+             "metadata": {}, "clicks": 0, "max_clicks": None, "expires_at": None}
+            for i in range(redirects)
+        ],
+        "user_preferences": [{"user_id": i, "prefs": {"home_city": "London"}} for i in range(users)],
+        "search_logs": [],
+    }
+
+
+def supabase_app(fault, backend):
+    def parse(request):
+        filters, order, limit = {}, None, None
+        for key, value in request.query_params.items():
+            if key == "order":
+                column, _, direction = value.partition(".")
+                order = (column, direction == "desc")
+            elif key == "limit":
+                limit = int(value)
+            elif key != "select" and value.startswith("eq."):
+                filters[key] = value[3:]
+        return filters, order, limit
+
+    async def table(request):
+        name = request.path_params["table"]
+        filters, order, limit = parse(request)
+        if request.method == "GET":
+            columns = request.query_params.get("select", "*")
+            return JSONResponse(await backend.select(name, filters, columns=columns, order=order, limit=limit))
+        body = await request.json()
+        if request.method == "POST":
+            await backend.insert(name, body if isinstance(body, list) else [body])
+        else:
+            await backend.update(name, body, filters)
+        return Response(status_code=201 if request.method == "POST" else 204)
+
+    async def rpc(request):
+        result = await backend.rpc(request.path_params["function"], await request.json())
+        return JSONResponse(result)
+
+    return _app(fault, [
+        ("/rest/v1/rpc/{function}", rpc, ["POST"]),
+        ("/rest/v1/{table}", table, ["GET", "POST", "PATCH"]),
+    ])
+
+
+# 📊 Elasticsearch
+def elastic_app(fault):
+    headers = {"X-Elastic-Product": "Elasticsearch"}
+
+    async def info(request):
+        return JSONResponse({"version": {"number": "8.13.0"}, "tagline": "You Know, for Search"}, headers=headers)
+
+    async def bulk(request):
+        lines = [line for line in (await request.body()).splitlines() if line.strip()]
+        items = [{"index": {"status": 201, "result": "created"}} for _ in range(len(lines) // 2)]
+        return JSONResponse({"took": 1, "errors": False, "items": items}, headers=headers)
+
+    return _app(fault, [("/", info, ["GET", "HEAD"]), ("/_bulk", bulk, ["POST", "PUT"])])
+
+
+# 🤖 LLM (OpenAI-compatible chat completions)
+TRIP = re.compile(r"from (\w[\w ]*?) to (\w[\w ]*?) on (\d{4}-\d{2}-\d{2})(?: until (\d{4}-\d{2}-\d{2}))?", re.I)
+
+
+def trip_answer(prompt):
+    # Echo the trip back from messages shaped like the ones load.py sends
+    message = prompt.split("User Message:", 1)[-1].split("\n", 1)[0]
+    match = TRIP.search(message)
+    if not match:
+        return json.dumps({"complete": False, "type": [], "follow_up": "Where and when would you like to go?"})
+    origin, destination, start, end = match.groups()
+    return json.dumps({
+        "complete": True, "type": ["flight", "hotel"], "origin": origin, "destination": destination,
+        "dates": {"start": start, "end": end or start}, "budget": {}, "updated_prefs": {}, "follow_up": ""
+    })
+
+
+def llm_app(fault, token_delay=0.0, chunk_size=8):
+    async def completions(request):
+        body = await request.json()
+        prompt = "\n".join(message.get("content", "") for message in body.get("messages", []))
+        text = trip_answer(prompt)
+        base = {"id": "chatcmpl-bench", "created": int(time.time()), "model": body.get("model", "bench")}
+        if not body.get("stream"):
+            return JSONResponse({
+                **base, "object": "chat.completion",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(text) // 4, "total_tokens": 0}
+            })
+
+        async def events():
+            for i in range(0, len(text), chunk_size):
+                chunk = {**base, "object": "chat.completion.chunk",
+                         "choices": [{"index": 0, "delta": {"content": text[i:i + chunk_size]}, "finish_reason": None}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+                if token_delay:
+                    await asyncio.sleep(token_delay)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return _app(fault, [("/v1/chat/completions", completions, ["POST"])])
+
+
+def build_apps(faults, token_delay=0.0, redirects=1000, users=1000):
+    backend = MemoryBackend(seed_tables(redirects, users))
+    return {
+        "travelpayouts": travelpayouts_app(faults["travelpayouts"]),
+        "hotellook": hotellook_app(faults["hotellook"]),
+        "skyscrapper": skyscrapper_app(faults["skyscrapper"]),
+        "supabase": supabase_app(faults["supabase"], backend),
+        "elastic": elastic_app(faults["elastic"]),
+        "llm": llm_app(faults["llm"], token_delay),
+    }
+
+
+def upstream_env(host, base_port):
+    """Environment variables that point the app at the stand-ins."""
+    url = {name: f"http://{host}:{base_port + offset}" for name, offset in UPSTREAMS.items()}
+    return {
+        "TRAVELPAYOUTS_URL": url["travelpayouts"],
+        "HOTELLOOK_URL": url["hotellook"],
+        "SKY_SCRAPPER_URL": url["skyscrapper"],
+        "SUPABASE_URL": url["supabase"],
+        "SUPABASE_KEY": "bench",
+        "DB_BACKEND": "supabase",
+        "ELASTIC_URL": url["elastic"],
+        "LLM_PROVIDER": "openai",
+        "LLM_FALLBACK_PROVIDERS": "",
+        "OPENAI_API_KEY": "bench",
+        "OPENAI_BASE_URL": f"{url['llm']}/v1",
+    }
+
+
+def _per_upstream(values, cast=float):
+    # ["travelpayouts=0.2", "0.05"] -> {"travelpayouts": 0.2, "*": 0.05}
+    parsed = {}
+    for value in values or []:
+        name, _, number = value.rpartition("=")
+        parsed[name or "*"] = cast(number)
+    return parsed
+
+
+def faults_from_args(args):
+    latency, jitter, errors = _per_upstream(args.latency), _per_upstream(args.jitter), _per_upstream(args.errors)
+    return {
+        name: Fault(
+            latency.get(name, latency.get("*", 0.0)),
+            jitter.get(name, jitter.get("*", 0.0)),
+            errors.get(name, errors.get("*", 0.0)),
+        )
+        for name in UPSTREAMS
+    }
+
+
+def add_fault_arguments(parser):
+    parser.add_argument("--latency", action="append", help="seconds, NAME=SECONDS or SECONDS for all (repeatable)")
+    parser.add_argument("--jitter", action="append", help="mean exponential extra latency, same format as --latency")
+    parser.add_argument("--errors", action="append", help="error rate 0..1 (HTTP 503), same format as --latency")
+    parser.add_argument("--llm-token-delay", type=float, default=0.0, help="seconds between streamed LLM chunks")
+
+
+async def serve(args):
+    apps = build_apps(faults_from_args(args), args.llm_token_delay, args.redirects, args.users)
+    servers = [
+        uvicorn.Server(uvicorn.Config(app, host=args.host, port=args.base_port + UPSTREAMS[name],
+                                      log_level="warning", access_log=False))
+        for name, app in apps.items()
+    ]
+    print(json.dumps({"fakes": {name: args.base_port + offset for name, offset in UPSTREAMS.items()}}), flush=True)
+    await asyncio.gather(*(server.serve() for server in servers))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--base-port", type=int, default=9100)
+    parser.add_argument("--redirects", type=int, default=1000, help="seeded redirect rows bench-0..N-1")
+    parser.add_argument("--users", type=int, default=1000, help="seeded user_preferences rows")
+    add_fault_arguments(parser)
+    sys.exit(asyncio.run(serve(parser.parse_args())))
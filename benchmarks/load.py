@@ -0,0 +1,292 @@
+"""Offline load test of the API against local upstream stand-ins.
+
+    python -m benchmarks.load --concurrency 1,10,50 --requests 500 --output results.jsonl
+    python -m benchmarks.load --scenario agent_llm --latency llm=0.8 --errors travelpayouts=0.1
+    python -m benchmarks.load --baseline results-main.jsonl
+
+Starts benchmarks.fakes and `uvicorn main:app` as subprocesses (the app is
+pointed at the fakes through upstream_env), then drives every scenario at each
+concurrency level. Prints one JSON line per (scenario, concurrency) with
+throughput, error count and p50/p95/p99 latency; --baseline adds the change
+against an earlier run's output.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+
+import httpx
+
+from benchmarks.fakes import CITIES, add_fault_arguments, upstream_env
+
+
+def _day(offset):
+    return (date.today() + timedelta(days=30 + offset)).isoformat()
+
+
+# Each scenario maps a request index to (method, path, params, json body); the
+# index cycles through --distinct variants so the cache hit rate is controllable
+def _trip(i):
+    city = CITIES[i % len(CITIES)]
+    return city, _day(i % 28), _day(i % 28 + 4)
+
+
+def _agent_message(i):
+    # Fully resolved by the rule-based trip parser, so the LLM is never called
+    city, start, end = _trip(i)
+    return f"Flight and hotel from London to {city} on {start} until {end} please, we are flexible about the rest"
+
+
+def _agent_llm_message(i):
+    # Too much free text for the trip parser's fast path, so extraction goes to the LLM stand-in
+    city, start, end = _trip(i)
+    return (f"Honestly we keep arguing about it, but roughly from London to {city} on {start} until {end}, "
+            f"somewhere quiet near the old town with good food")
+
+
+def agent(i):
+    return "POST", "/agent", None, {"user_id": i, "message": _agent_message(i)}
+
+
+def agent_stream(i):
+    return "GET", "/agent-stream", {"user_id": i, "message": _agent_message(i)}, None
+
+
+def agent_llm(i):
+    return "POST", "/agent", None, {"user_id": i, "message": _agent_llm_message(i)}
+
+
+def agent_stream_llm(i):
+    return "GET", "/agent-stream", {"user_id": i, "message": _agent_llm_message(i)}, None
+
+
+def search_flights(i):
+    city, start, end = _trip(i)
+    return "GET", "/search/flights", {"origin": "LON", "destination": city[:3].upper(), "date": start, "return_date": end}, None
+
+
+def search_hotels(i):
+    city, start, end = _trip(i)
+    return "GET", "/search/hotels", {"location": city, "checkin": start, "checkout": end, "adults": 2, "limit": 5}, None
+
+
+def search_cars(i):
+    city, start, end = _trip(i)
+    return "GET", "/search/cars", {"pickup_iata": city[:3].upper(), "dropoff_iata": city[:3].upper(),
+                                   "pickup_name": city, "date": start, "return_date": end}, None
+
+
+def search_insurance(i):
+    city, start, end = _trip(i)
+    return "GET", "/search/insurance", {"destination": city, "start": start, "end": end}, None
+
+
+def search_esim(i):
+    return "GET", "/search/esim", {"destination": CITIES[i % len(CITIES)]}, None
+
+
+def search_batch(i):
+    # Ten trips, flight + hotel each, with one repeated query to exercise dedupe
+    queries = []
+    for n in range(i, i + 10):
+        city, start, end = _trip(n)
+        queries.append({"type": "flight", "origin": "LON", "destination": city[:3].upper(), "date": start, "return_date": end})
+        queries.append({"type": "hotel", "location": city, "checkin": start, "checkout": end, "adults": 2, "limit": 5})
+    queries.append(dict(queries[0]))
+    return "POST", "/search/batch", None, {"queries": queries}
+
+
+def redirect(i):
+    return "GET", f"/r/bench-{i}", None, None
+
+
+SCENARIOS = {
+    "agent": agent,
+    "agent_stream": agent_stream,
+    "agent_llm": agent_llm,
+    "agent_stream_llm": agent_stream_llm,
+    "search_flights": search_flights,
+    "search_hotels": search_hotels,
+    "search_cars": search_cars,
+    "search_insurance": search_insurance,
+    "search_esim": search_esim,
+    "search_batch": search_batch,
+    "redirect": redirect,
+}
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def _one(client, scenario, i):
+    method, path, params, body = SCENARIOS[scenario](i)
+    started = time.perf_counter()
+    first_byte = None
+    async with client.stream(method, path, params=params, json=body) as response:
+        async for _ in response.aiter_raw():
+            if first_byte is None:
+                first_byte = time.perf_counter() - started
+    ok = response.status_code < 400 if scenario != "redirect" else response.status_code == 302
+    return ok, time.perf_counter() - started, first_byte
+
+
+async def run_level(client, scenario, concurrency, requests, distinct):
+    latencies, first_bytes = [], []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for n in counter:
+            try:
+                ok, latency, first_byte = await _one(client, scenario, n % distinct)
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            errors += not ok
+            latencies.append(latency)
+            if first_byte is not None:
+                first_bytes.append(first_byte)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    first_bytes.sort()
+
+    def ms(value):
+        return round(value * 1000, 2) if value is not None else None
+
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "rps": round(requests / elapsed, 2) if elapsed else None,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "mean_ms": ms(statistics.fmean(latencies)) if latencies else None,
+        "ttfb_p50_ms": ms(percentile(first_bytes, 50)),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def _load_baseline(path):
+    baseline = {}
+    with open(path) as f:
+        for line in f:
+            row = json.loads(line)
+            if "scenario" in row:
+                baseline[(row["scenario"], row["concurrency"])] = row
+    return baseline
+
+
+def _compare(row, before):
+    for field in ("rps", "p50_ms", "p95_ms", "p99_ms"):
+        if before and before.get(field) and row.get(field) is not None:
+            row[f"{field}_change_pct"] = round((row[field] - before[field]) / before[field] * 100, 1)
+
+
+async def _wait_ready(client, process, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("app exited during startup")
+        try:
+            await client.get("/openapi.json")
+            return
+        except httpx.HTTPError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError("app did not become ready")
+
+
+def _fault_args(args):
+    forwarded = []
+    for flag in ("latency", "jitter", "errors"):
+        for value in getattr(args, flag) or []:
+            forwarded += [f"--{flag}", value]
+    return forwarded + ["--llm-token-delay", str(args.llm_token_delay), "--redirects", str(args.distinct)]
+
+
+async def main(args):
+    env = dict(os.environ)
+    env.update(upstream_env(args.host, args.fake_port))
+    # Local, unauthenticated, no persisted caches; anything already set in the environment wins
+    for key, value in {"ENV": "local", "EXTRACTION_CACHE_PATH": "", "REDIRECT_MODE": "db"}.items():
+        env.setdefault(key, value)
+
+    fakes = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fakes", "--host", args.host, "--base-port", str(args.fake_port)] + _fault_args(args),
+        env=env
+    )
+    app = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", args.host, "--port", str(args.port),
+         "--log-level", "warning", "--no-access-log", "--workers", str(args.workers)],
+        env=env
+    )
+    baseline = _load_baseline(args.baseline) if args.baseline else {}
+    commit = _git_commit()
+    output = open(args.output, "a") if args.output else None
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    try:
+        async with httpx.AsyncClient(base_url=f"http://{args.host}:{args.port}", timeout=args.timeout, limits=limits) as client:
+            await _wait_ready(client, app, args.startup_timeout)
+            for scenario in args.scenario or list(SCENARIOS):
+                if args.warmup:
+                    await run_level(client, scenario, min(args.concurrency), args.warmup, args.distinct)
+                for concurrency in args.concurrency:
+                    row = await run_level(client, scenario, concurrency, args.requests, args.distinct)
+                    row["commit"] = commit
+                    _compare(row, baseline.get((scenario, concurrency)))
+                    line = json.dumps(row)
+                    print(line, flush=True)
+                    if output:
+                        output.write(line + "\n")
+    finally:
+        if output:
+            output.close()
+        for process in (app, fakes):
+            process.terminate()
+        for process in (app, fakes):
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="default: all (repeatable)")
+    parser.add_argument("--concurrency", type=lambda value: [int(n) for n in value.split(",")], default=[1, 10, 50])
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario and concurrency level")
+    parser.add_argument("--distinct", type=int, default=200, help="distinct request variants (lower = more cache hits)")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests before each scenario")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--fake-port", type=int, default=9100)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--startup-timeout", type=float, default=30.0)
+    parser.add_argument("--output", help="append result lines to this file")
+    parser.add_argument("--baseline", help="earlier --output file to compare against")
+    add_fault_arguments(parser)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,140 @@
+"""Micro-benchmark the upstream response parsers on recorded fixtures.
+
+    python -m benchmarks.parsers --number 500
+
+Compares the previous path (stdlib decode, raw payload formatted into an INFO
+log line, dict per offer) with app.services.normalize (fast_json decode, raw
+payload logged only at DEBUG or when sampled, slotted records). Prints one JSON
+line per fixture with microseconds per call for both paths.
+"""
+import argparse
+import json
+import logging
+import sys
+import timeit
+from pathlib import Path
+
+from app.services import normalize
+from app.services.hotellook import AFFILIATE_TEMPLATE
+from app.utils import fast_json
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+# The parsing code as it was before normalize.py, kept here as the baseline
+def legacy_v1(body, origin):
+    data = json.loads(body)
+    logging.info(f"Flight API raw response: {data}")
+    flights = []
+    currency = data.get("currency", "USD")
+    for dest, offers in data.get("data", {}).items():
+        for offer_id, flight in offers.items():
+            flights.append({
+                "price": flight.get("price", 0),
+                "currency": currency,
+                "origin": origin,
+                "destination": dest,
+                "departure_date": flight.get("departure_at"),
+                "return_date": flight.get("return_at"),
+                "airline": flight.get("airline"),
+                "flight_number": flight.get("flight_number"),
+                "affiliate_link": f"https://www.aviasales.com/search/{origin}0101{dest}0202"
+            })
+    return flights
+
+
+def legacy_v2(body):
+    data = json.loads(body)
+    logging.info(f"Flight API raw response: {data}")
+    currency = data.get("currency", "USD")
+    return [{
+        "price": flight.get("price", 0),
+        "currency": currency,
+        "origin": flight.get("origin"),
+        "destination": flight.get("destination"),
+        "departure_date": flight.get("depart_date"),
+        "affiliate_link": flight.get("link", "")
+    } for flight in data.get("data", [])]
+
+
+def legacy_cars(body, provider):
+    text = body.decode("utf-8")
+    logging.warning(f"[Sky-Scrapper] RAW resp.text (first 500 chars): {text[:500]}")
+    data = json.loads(text)
+    if isinstance(data, str):
+        data = json.loads(data)
+    return [{
+        "price": offer.get("tot_price"),
+        "currency": offer.get("currency", "EUR"),
+        "car_model": offer.get("sipp", "Unknown"),
+        "pickup_location": offer.get("loc", {}).get("pu", "PU"),
+        "dropoff_location": offer.get("loc", {}).get("do", "DO"),
+        "affiliate_link": offer.get("deeplink", ""),
+        "provider": provider
+    } for offer in data.get("data", {}).get("quotes", [])]
+
+
+def legacy_hotels(body):
+    data = json.loads(body)
+    for hotel in data:
+        hotel["affiliate_link"] = AFFILIATE_TEMPLATE.format(
+            hotel_id=hotel.get("hotelId"), checkin="2026-11-10", checkout="2026-11-14", adults=2
+        )
+    return data
+
+
+def current_v1(body):
+    normalize.log_raw("Flight API", body)
+    return normalize.parse_travelpayouts_v1(body, "LON")
+
+
+def current_v2(body):
+    normalize.log_raw("Flight API", body)
+    return normalize.parse_travelpayouts_v2(body)
+
+
+def current_cars(body):
+    normalize.log_raw("[Sky-Scrapper]", body)
+    return normalize.parse_sky_scrapper(body, "sky-scrapper")
+
+
+def current_hotels(body):
+    normalize.log_raw("Hotellook", body)
+    return normalize.parse_hotellook(body, AFFILIATE_TEMPLATE, "2026-11-10", "2026-11-14", 2)
+
+
+CASES = {
+    "travelpayouts_v1": (lambda body: legacy_v1(body, "LON"), current_v1),
+    "travelpayouts_v2": (legacy_v2, current_v2),
+    "sky_scrapper": (lambda body: legacy_cars(body, "sky-scrapper"), current_cars),
+    "hotellook": (legacy_hotels, current_hotels),
+}
+
+
+def main(args):
+    # INFO, as in production; a NullHandler keeps console I/O out of the numbers
+    logging.basicConfig(level=logging.INFO, handlers=[logging.NullHandler()])
+    for name, (legacy, current) in CASES.items():
+        body = (FIXTURES / f"{name}.json").read_bytes()
+        if len(legacy(body)) != len(current(body)):
+            print(json.dumps({"fixture": name, "error": "parsers disagree on the number of results"}))
+            return 1
+        legacy_us = min(timeit.repeat(lambda: legacy(body), number=args.number, repeat=args.repeat)) / args.number * 1e6
+        current_us = min(timeit.repeat(lambda: current(body), number=args.number, repeat=args.repeat)) / args.number * 1e6
+        print(json.dumps({
+            "fixture": name,
+            "bytes": len(body),
+            "results": len(current(body)),
+            "legacy_us": round(legacy_us, 1),
+            "current_us": round(current_us, 1),
+            "speedup": round(legacy_us / current_us, 2),
+            "orjson": fast_json.orjson is not None,
+        }))
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    sys.exit(main(parser.parse_args()))
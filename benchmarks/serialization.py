@@ -0,0 +1,95 @@
+"""Benchmark response serialization on realistic hotel and flight payloads.
+
+    python -m benchmarks.serialization --number 200
+
+"default" is FastAPI's path for a plain list/dict return value
+(jsonable_encoder + JSONResponse.render); "fast" is FastJSONResponse.render on
+the same content. The SSE case encodes one event per result, comparing the old
+str events (json.dumps, encoded by the server) with the bytes encoder in
+app/utils/sse.py. Prints one JSON line per payload.
+"""
+import argparse
+import json
+import sys
+import timeit
+from pathlib import Path
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.services import normalize
+from app.services.hotellook import AFFILIATE_TEMPLATE
+from app.utils import fast_json
+from app.utils.responses import FastJSONResponse
+from app.utils.sse import sse_event
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def _decorate(results, content_type):
+    # What trip_search._collect adds before the response is built
+    for i, item in enumerate(results):
+        item["redirect_url"] = f"https://yourdomain.com/r/00000000-0000-4000-8000-{i:012d}"
+        item["affiliate_provider"] = content_type
+    return results
+
+
+def payloads():
+    hotels = normalize.parse_hotellook(
+        (FIXTURES / "hotellook.json").read_bytes(), AFFILIATE_TEMPLATE, "2026-11-10", "2026-11-14", 2
+    )
+    flights = normalize.to_dicts(normalize.parse_travelpayouts_v1((FIXTURES / "travelpayouts_v1.json").read_bytes(), "LON"))
+    return {"hotels": _decorate(hotels, "hotellook"), "flights": _decorate(flights, "travelpayouts")}
+
+
+def default_render(content):
+    return JSONResponse(content=jsonable_encoder(content)).body
+
+
+def fast_render(content):
+    return FastJSONResponse(content=content).body
+
+
+def legacy_sse(events):
+    out = []
+    for data in events:
+        text = json.dumps(data, ensure_ascii=False)
+        out.append("".join(f"data: {line}\n" for line in text.split("\n")) + "\n")
+    return [chunk.encode("utf-8") for chunk in out]
+
+
+def fast_sse(events):
+    return [sse_event(data) for data in events]
+
+
+def _us(fn, content, args):
+    return min(timeit.repeat(lambda: fn(content), number=args.number, repeat=args.repeat)) / args.number * 1e6
+
+
+def main(args):
+    for name, content in payloads().items():
+        if json.loads(default_render(content)) != json.loads(fast_render(content)):
+            print(json.dumps({"payload": name, "error": "serializers disagree"}))
+            return 1
+        default_us, fast_us = _us(default_render, content, args), _us(fast_render, content, args)
+        legacy_sse_us, fast_sse_us = _us(legacy_sse, content, args), _us(fast_sse, content, args)
+        print(json.dumps({
+            "payload": name,
+            "items": len(content),
+            "bytes": len(fast_render(content)),
+            "default_us": round(default_us, 1),
+            "fast_us": round(fast_us, 1),
+            "speedup": round(default_us / fast_us, 2),
+            "sse_legacy_us": round(legacy_sse_us, 1),
+            "sse_fast_us": round(fast_sse_us, 1),
+            "sse_speedup": round(legacy_sse_us / fast_sse_us, 2),
+            "orjson": fast_json.orjson is not None,
+        }))
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    sys.exit(main(parser.parse_args()))
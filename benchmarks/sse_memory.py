@@ -0,0 +1,78 @@
+"""Open thousands of concurrent SSE sessions and check tasks and memory stay flat.
+
+    python -m benchmarks.sse_memory --streams 5000 --rounds 5
+
+Half of the streams are abandoned after a few events (a client disconnect),
+the rest run to completion. After each round every session task must be gone
+and traced memory must not keep growing. Prints one JSON line per round and
+exits non-zero on a leak.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import sys
+import tracemalloc
+
+from app.utils.sse import SSESession
+
+
+async def producer(session, events, delay):
+    for i in range(events):
+        await session.send({"stage": "step", "i": i, "payload": "x" * 64})
+        await asyncio.sleep(delay)
+    await session.close("end")
+
+
+async def consume(session, abandon_after):
+    stream = session.stream()
+    received = 0
+    async for _ in stream:
+        received += 1
+        if abandon_after and received >= abandon_after:
+            break
+    await stream.aclose()
+    return received
+
+
+async def run_round(streams, events, delay):
+    sessions = [SSESession(lambda s: producer(s, events, delay), heartbeat=0.05) for _ in range(streams)]
+    await asyncio.gather(*(
+        consume(session, abandon_after=3 if i % 2 else 0) for i, session in enumerate(sessions)
+    ))
+
+
+async def main(args):
+    tracemalloc.start()
+    baseline_tasks = len(asyncio.all_tasks())
+    samples = []
+    for round_no in range(1, args.rounds + 1):
+        await run_round(args.streams, args.events, args.delay)
+        await asyncio.sleep(0)
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+        leaked_tasks = len(asyncio.all_tasks()) - baseline_tasks
+        samples.append(current)
+        print(json.dumps({
+            "round": round_no, "streams": args.streams, "leaked_tasks": leaked_tasks,
+            "traced_kib": current // 1024, "peak_kib": peak // 1024
+        }))
+        if leaked_tasks:
+            return 1
+
+    # Allow some allocator noise, but memory after the last round must not trend upwards
+    growth = samples[-1] - samples[1] if len(samples) > 2 else 0
+    if growth > args.max_growth_kib * 1024:
+        print(json.dumps({"error": "memory grew across rounds", "growth_kib": growth // 1024}))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--streams", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--events", type=int, default=20)
+    parser.add_argument("--delay", type=float, default=0.001)
+    parser.add_argument("--max-growth-kib", type=int, default=512)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,93 @@
+"""Measure cold-start import time of the app, per module.
+
+    python -m benchmarks.startup_time --top 25
+
+Imports the target module (default: main) in a fresh interpreter with
+`python -X importtime`, once per run, and reports the slowest modules by
+cumulative import time (median over runs). Prints one JSON line per module and
+a final summary line; exits non-zero if the import fails or takes longer than
+--max-seconds.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+# import time: self [us] | cumulative | imported package
+LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def import_once(module, env):
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - started
+    modules = {}
+    errors = []
+    for line in proc.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules[name] = {"self_us": int(self_us), "cumulative_us": int(cumulative_us), "depth": len(indent) // 2}
+        elif not line.startswith("import time:"):
+            errors.append(line)
+    return proc.returncode, wall, modules, errors
+
+
+def main(args):
+    env = dict(os.environ)
+    # Local defaults so the import never needs real credentials or services
+    env.setdefault("ENV", "local")
+    env.setdefault("DB_BACKEND", "memory")
+
+    walls = []
+    runs = []
+    for _ in range(args.runs):
+        code, wall, modules, errors = import_once(args.module, env)
+        if code:
+            print(json.dumps({"error": f"import {args.module} failed", "stderr": errors[-5:]}))
+            return 1
+        walls.append(wall)
+        runs.append(modules)
+
+    names = set().union(*runs)
+    rows = []
+    for name in names:
+        samples = [run[name] for run in runs if name in run]
+        rows.append({
+            "module": name,
+            "cumulative_ms": round(statistics.median(s["cumulative_us"] for s in samples) / 1000, 2),
+            "self_ms": round(statistics.median(s["self_us"] for s in samples) / 1000, 2),
+            "depth": samples[0]["depth"],
+        })
+    rows.sort(key=lambda row: row["cumulative_ms"], reverse=True)
+    if args.prefix:
+        rows = [row for row in rows if row["module"].startswith(tuple(args.prefix))]
+    for row in rows[:args.top]:
+        print(json.dumps(row))
+
+    wall = statistics.median(walls)
+    print(json.dumps({
+        "module": args.module, "runs": args.runs, "wall_seconds": round(wall, 3),
+        "modules_imported": round(statistics.median(len(run) for run in runs))
+    }))
+    if args.max_seconds and wall > args.max_seconds:
+        print(json.dumps({"error": "startup too slow", "wall_seconds": round(wall, 3), "max_seconds": args.max_seconds}))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--prefix", action="append", help="only report modules starting with this (repeatable), e.g. app.")
+    parser.add_argument("--max-seconds", type=float, default=0)
+    sys.exit(main(parser.parse_args()))
@@ -2,10 +2,8 @@
 # 🚀 Pydantic Models for Swagger
 # ==============================
 import asyncio
-from datetime import datetime
 from http.client import HTTPException
 import json
-from aiohttp import request
 from fastapi.params import Header
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
@@ -34,11 +32,14 @@ class AgentResponse(BaseModel):
 # 🌐 FastAPI Setup
 # ====================
 import os
+import time
 import logging
+from contextlib import asynccontextmanager
+from functools import partial
 from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 
 from app.routers.flights import router as flight_router
@@ -46,8 +47,70 @@ from app.routers.hotels import router as hotel_router
 from app.routers.esim import router as esim_router
 from app.routers.cars import router as cars_router
 from app.routers.insurance import router as insurance_router
+from app.routers.batch import router as batch_router
 from app.routers.redirect import router as redirect_router
+from app.routers.admin import router as admin_router
 from app.services.agent import handle_user_request
+from app.services.flightlook import API_V1_URL
+from app.services.hotellook import BASE_URL as HOTELLOOK_URL
+from app.services.searchcars import SKY_SCRAPPER_API_URL
+from app.utils.serpapi_utils import SERPAPI_URL
+from app.utils.http_client import init_http_clients, close_http_clients
+from app.utils.db import db
+from app.utils.write_behind import write_behind
+from app.utils.redirect_cache import redirect_cache
+from app.utils.affiliates import affiliate_registry
+from app.utils.result_cache import result_cache
+from app.utils.provider_health import provider_health
+from app.utils.extraction_cache import extraction_cache
+from app.utils.llm_provider import llm_stats, warm_up as warm_up_llm
+from app.utils.preference_store import preference_store
+from app.utils.sse import SSESession
+from app.utils.responses import FastJSONResponse
+from app.utils.logger import get_es
+from app.utils.metrics import metrics, METRICS_ENABLED, record_cache, db_queries, db_errors
+
+# 🔥 SDKs and external clients load on first use; STARTUP_WARMUP=true loads them during startup instead
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "false").lower() in ("1", "true", "yes")
+
+async def warm_up():
+    started = time.perf_counter()
+    await asyncio.to_thread(warm_up_llm)
+    try:
+        await asyncio.to_thread(get_es)
+    except Exception as e:
+        logging.warning(f"[Startup] Elasticsearch warm-up failed: {e}")
+    logging.info(f"[Startup] Warm-up done in {time.perf_counter() - started:.2f}s")
+
+# =====================
+# ♻️ Lifespan (shared resources)
+# =====================
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_http_clients([
+        API_V1_URL,
+        HOTELLOOK_URL,
+        SKY_SCRAPPER_API_URL,
+        SERPAPI_URL,
+        os.getenv("BASE_DOMAIN", "https://yourdomain.com"),
+    ])
+    await db.start()
+    await write_behind.start()
+    await redirect_cache.start()
+    await affiliate_registry.start()
+    extraction_cache.load()
+    await metrics.start()
+    if STARTUP_WARMUP:
+        await warm_up()
+    yield
+    await metrics.stop()
+    extraction_cache.save()
+    await affiliate_registry.stop()
+    await redirect_cache.stop()
+    await preference_store.flush()
+    await write_behind.stop()
+    await db.stop()
+    await close_http_clients()
 
 # =============
 # 🚀 App Config
@@ -55,7 +118,9 @@ from app.services.agent import handle_user_request
 app = FastAPI(
     title="Dude MCP Affiliate API",
     description="Affiliate service for hotels, flights, cars, and insurance",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -79,12 +144,19 @@ if os.getenv("ENV") != "local":
     from app.utils.auth import AuthMiddleware
     app.add_middleware(AuthMiddleware)
 
+# =====================
+# 🧵 Tracing (outermost, so the root span covers auth too)
+# =====================
+from app.utils.tracing import TracingMiddleware
+app.add_middleware(TracingMiddleware)
+
 # =====================
 # 📡 Main /agent Endpoint
 # =====================
 @app.post("/agent", response_model=AgentResponse)
 async def travel_agent_entry(payload: AgentRequest):
-    return await handle_user_request(payload.dict())
+    # response_model documents the shape; returning the response directly skips re-validation and jsonable_encoder
+    return FastJSONResponse(await handle_user_request(payload.dict()))
 
 @app.get("/status")
 async def mcp_status(request: Request):
@@ -94,10 +166,40 @@ async def mcp_status(request: Request):
         return Response(status_code=401)
     return {
         "status": "ok",
-        "tools": ["flight", "hotel", "car", "insurance", "esim"]
+        "tools": ["flight", "hotel", "car", "insurance", "esim"],
+        "write_behind": write_behind.snapshot(),
+        "redirect_cache": redirect_cache.snapshot(),
+        "affiliates": affiliate_registry.snapshot(),
+        "result_cache": result_cache.snapshot(),
+        "providers": provider_health.snapshot(),
+        "extraction_cache": extraction_cache.snapshot(),
+        "preferences": preference_store.snapshot(),
+        "db": db.snapshot(),
+        "llm": llm_stats
     }
 
 
+# 📈 Cache and db counters already live on their owners; mirror them into /metrics at scrape time
+def _collect_metrics():
+    for kind, stats in result_cache.stats.items():
+        record_cache(f"result_{kind}", stats["hits"] + stats["stale_hits"], stats["misses"])
+    stats = redirect_cache.stats
+    record_cache("redirect", stats["hits"] + stats["negative_hits"], stats["misses"])
+    record_cache("extraction", extraction_cache.stats["hits"], extraction_cache.stats["misses"])
+    record_cache("preferences", preference_store.stats["hits"], preference_store.stats["misses"])
+    for operation, stat in db.stats.items():
+        db_queries.set_total(stat["count"], operation)
+        db_errors.set_total(stat["errors"], operation)
+
+metrics.register_collector(_collect_metrics)
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    if not METRICS_ENABLED:
+        return Response(status_code=404)
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/tools")
 async def get_tools(
     request: Request,
@@ -123,95 +225,83 @@ async def agent_stream_post(request: Request):
     user_id = data.get("user_id")
     message = data.get("message")
     channel = data.get("channel", "telegram")
-    return await agent_stream(user_id=user_id, message=message, channel=channel)
-
-@app.get("/agent-stream")
-async def agent_stream(user_id: int, message: str, channel: str = "telegram"):
-    async def event_generator():
-        processing = True
-        queue = asyncio.Queue()
-
-        # 👂 Background keep-alive sender
-        async def keep_alive():
-            while processing:
-                await queue.put(f"data: 🟢 keep-alive {datetime.utcnow().isoformat()}\n\n")
-                await asyncio.sleep(10)
-
-        # 📦 Main processing logic
-        async def main_flow():
-            nonlocal processing
-            await queue.put("data: ✅ Request received. Starting processing...\n\n")
-            await asyncio.sleep(0.5)
-
-            # Step 1: Load user preferences
-            from app.utils.memory import get_user_preferences
-            prefs = await get_user_preferences(user_id)
-            await queue.put(f"data: 🗂️ Loaded preferences: {json.dumps(prefs)}\n\n")
-            await asyncio.sleep(0.5)
-
-            # Step 2: Extract trip info
-            from app.utils.llm import extract_trip_info_stream
-            update = None
-
-            try:
-                async for step in extract_trip_info_stream(message, prefs):
-                    update = step
-                    await queue.put(f"data: {json.dumps(step, ensure_ascii=False)}\n\n")
-                    await asyncio.sleep(0.05)
-            except Exception as e:
-                await queue.put(f"data: ❌ Error extracting trip info: {str(e)}\n\n")
-                await queue.put("event: close\ndata: error\n\n")
-                processing = False
-                return
-
-            trip_info = update.get("final_info", {}) if update else {}
-
-            if not trip_info or not trip_info.get("complete"):
-                await queue.put(f"data: ⚠️ Missing fields: {trip_info.get('missing_fields')}\n\n")
-                await queue.put("event: close\ndata: incomplete\n\n")
-                processing = False
-                return
-
-            # Step 4: Call API Gateway
-            await queue.put("data: 🚀 Calling flight/hotel APIs...\n\n")
-            from app.utils.api_gateway import call_trip_api
+    return await agent_stream(request, user_id=user_id, message=message, channel=channel)
+
+# 📦 Main /agent-stream processing logic, emitting events through the SSE session
+async def agent_stream_flow(session: SSESession, user_id, message, channel):
+    await session.send("✅ Request received. Starting processing...")
+
+    # Step 1: Load user preferences
+    from app.utils.memory import get_user_preferences
+    prefs = await get_user_preferences(user_id)
+    await session.send(f"🗂️ Loaded preferences: {json.dumps(prefs)}")
+
+    # Step 2: Extract trip info (searches may start before the LLM finishes)
+    from app.utils.llm import extract_trip_info_stream
+    from app.utils.api_gateway import call_trip_api, search_signature
+    update = None
+    early_info = None
+    search_task = None
+
+    try:
+        try:
+            async for step in extract_trip_info_stream(message, prefs):
+                update = step
+                if step.get("stage") == "search_ready" and search_task is None:
+                    early_info = step["trip_info"]
+                    search_task = asyncio.create_task(call_trip_api(early_info))
+                await session.send(step)
+        except Exception as e:
+            await session.send(f"❌ Error extracting trip info: {str(e)}")
+            await session.close("error")
+            return
+
+        trip_info = update.get("final_info", {}) if update else {}
+
+        if not trip_info or not trip_info.get("complete"):
+            await session.send(f"⚠️ Missing fields: {trip_info.get('missing_fields')}")
+            await session.close("incomplete")
+            return
+
+        # Step 4: Call API Gateway (reuse the early search if the final info agrees)
+        await session.send("🚀 Calling flight/hotel APIs...")
+        if search_task and search_signature(early_info) == search_signature(trip_info):
+            results = await search_task
+        else:
             results = await call_trip_api(trip_info)
+    finally:
+        # Cancelled on disconnect or superseded: never leave the early search running
+        if search_task and not search_task.done():
+            search_task.cancel()
+            await asyncio.gather(search_task, return_exceptions=True)
+
+    # Step 5: Stream final reply
+    reply = results.get("formatted_reply", "✅ Done, here are your options.")
+    await session.send(f"💬 Final reply: {reply}")
+
+    # Step 6: Send structured response
+    response_data = {
+        "reply": reply,
+        "can_search": trip_info.get("complete", False),
+        "search_types": trip_info.get("type", []),
+        "missing_fields": trip_info.get("missing_fields", []),
+        "flights": results.get("flights", []),
+        "hotels": results.get("hotels", []),
+        "origin": trip_info.get("origin"),
+        "destination": trip_info.get("destination"),
+        "dates": trip_info.get("dates", {}),
+        "adults": trip_info.get("adults", 1),
+        "children": trip_info.get("children", 0)
+    }
+    await session.send(response_data)
+    await session.close("end")
 
-            # Step 5: Stream final reply
-            reply = results.get("formatted_reply", "✅ Done, here are your options.")
-            await queue.put(f"data: 💬 Final reply: {reply}\n\n")
-
-            # Step 6: Send structured response
-            response_data = {
-                "reply": reply,
-                "can_search": trip_info.get("complete", False),
-                "search_types": trip_info.get("type", []),
-                "missing_fields": trip_info.get("missing_fields", []),
-                "flights": results.get("flights", []),
-                "hotels": results.get("hotels", []),
-                "origin": trip_info.get("origin"),
-                "destination": trip_info.get("destination"),
-                "dates": trip_info.get("dates", {}),
-                "adults": trip_info.get("adults", 1),
-                "children": trip_info.get("children", 0)
-            }
-            await queue.put(f"data: {json.dumps(response_data, ensure_ascii=False)}\n\n")
-            await queue.put("event: close\ndata: end\n\n")
-            processing = False
-
-        # 🔁 Start both keep-alive and main logic in parallel
-        asyncio.create_task(keep_alive())
-        asyncio.create_task(main_flow())
-
-        # 🔄 Yield events from the queue
-        while True:
-            item = await queue.get()
-            if item is None:
-                break
-            yield item
+@app.get("/agent-stream")
+async def agent_stream(request: Request, user_id: int, message: str, channel: str = "telegram"):
+    session = SSESession(partial(agent_stream_flow, user_id=user_id, message=message, channel=channel), request)
 
     return StreamingResponse(
-        event_generator(),
+        session.stream(),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache, no-transform",
@@ -224,17 +314,11 @@ async def agent_stream(user_id: int, message: str, channel: str = "telegram"):
 
 @app.get("/agent-stream-debug")
 async def agent_stream_debug(user_id: int, message: str, channel: str = "telegram"):
-    from starlette.background import BackgroundTask
     from starlette.responses import PlainTextResponse
 
-    buffer = []
-
-    async def capture_stream():
-        async for chunk in agent_stream(user_id, message, channel):
-            buffer.append(chunk)
-
-    await capture_stream()
-    return PlainTextResponse("".join(buffer))
+    session = SSESession(partial(agent_stream_flow, user_id=user_id, message=message, channel=channel))
+    buffer = [chunk async for chunk in session.stream()]
+    return PlainTextResponse(b"".join(buffer))
 
 
 
@@ -258,7 +342,9 @@ app.include_router(hotel_router)
 app.include_router(cars_router)
 app.include_router(insurance_router)
 app.include_router(esim_router)
+app.include_router(batch_router)
 app.include_router(redirect_router)
+app.include_router(admin_router)
 
 # =====================
 # 📋 Logging
@@ -0,0 +1,20 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers.batch import router
+from app.utils import fast_json
+
+
+def _post(queries):
+    app = FastAPI()
+    app.include_router(router)
+    response = TestClient(app).post("/search/batch", json={"queries": queries})
+    return response.status_code, [fast_json.loads(line) for line in response.text.splitlines()]
+
+
+def test_non_string_types_get_an_error_line():
+    status, lines = _post([{"type": ["flight"]}, {"type": {"a": 1}}, "flight", {"type": "bogus"}])
+    assert status == 200
+    assert [line["index"] for line in sorted(lines, key=lambda line: line["index"])] == [0, 1, 2, 3]
+    assert all("Unknown type" in line["error"] or "must be an object" in line["error"] for line in lines)
+    assert all(line["type"] in (None, "bogus") for line in lines)
@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+from app.utils import llm_provider
+
+
+async def _collect(stream):
+    return [delta async for delta in stream]
+
+
+def _stream(deltas, stall_after):
+    async def stream(*args):
+        for i, delta in enumerate(deltas):
+            if i == stall_after:
+                await asyncio.sleep(10)
+            yield delta
+    return stream
+
+
+@pytest.fixture(autouse=True)
+def short_timeouts(monkeypatch):
+    monkeypatch.setattr(llm_provider, "LLM_FIRST_TOKEN_TIMEOUT", 0.05)
+    monkeypatch.setattr(llm_provider, "LLM_TIMEOUT", 0.2)
+    monkeypatch.setattr(llm_provider, "LLM_FALLBACK_PROVIDERS", [])
+
+
+def test_stalled_first_token_times_out_and_frees_the_slot(monkeypatch):
+    monkeypatch.setattr(llm_provider, "_load", lambda provider, kind: _stream(["a"], stall_after=0))
+    with pytest.raises(asyncio.TimeoutError, match="first token"):
+        asyncio.run(_collect(llm_provider.stream_llm_agent("hi", {}, [])))
+    assert llm_provider.llm_stats[llm_provider.PROVIDER]["inflight"] == 0
+
+
+def test_stream_stalling_midway_times_out():
+    stream = _stream(["a", "b", "c"], stall_after=2)()
+    with pytest.raises(asyncio.TimeoutError, match="end of stream"):
+        asyncio.run(_collect(llm_provider._timed_stream(stream)))
+
+
+def test_stream_within_the_timeouts_passes_through():
+    assert asyncio.run(_collect(llm_provider._timed_stream(_stream(["a", "b"], stall_after=None)()))) == ["a", "b"]
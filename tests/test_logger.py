@@ -0,0 +1,15 @@
+from app.utils import logger
+from app.utils.write_behind import write_behind
+
+
+def test_redirect_rows_keep_the_metadata_as_it_was_when_stored(monkeypatch):
+    queued = []
+    monkeypatch.setattr(write_behind, "put", lambda sink, target, record: queued.append(record))
+    monkeypatch.setattr(logger, "SIGNED_REDIRECTS", False)
+
+    item = {"price": 120, "affiliate_link": "https://example.com/offer"}
+    guid, url = logger.store_redirect(item["affiliate_link"], "flight", item)
+    item["redirect_url"] = url
+
+    assert queued[0]["guid"] == guid
+    assert "redirect_url" not in queued[0]["metadata"]
@@ -0,0 +1,26 @@
+import asyncio
+
+from app.utils.preference_store import PreferenceStore
+
+
+def test_concurrent_updates_on_a_cold_user_keep_both_changes():
+    saved = {}
+
+    async def load(user_id):
+        await asyncio.sleep(0.01)
+        return {"currency": "EUR"}
+
+    async def save(user_id, prefs):
+        saved[user_id] = prefs
+
+    store = PreferenceStore(write_delay=0.01)
+    store.register_backend(load, save)
+
+    async def run():
+        await asyncio.gather(store.update("u1", {"a": 1}), store.update("u1", {"b": 2}))
+        await store.flush()
+        return await store.get("u1")
+
+    expected = {"currency": "EUR", "a": 1, "b": 2}
+    assert asyncio.run(run()) == expected
+    assert saved["u1"] == expected
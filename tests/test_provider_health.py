@@ -0,0 +1,68 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services import trip_search
+from app.services.fanout import fan_out
+from app.services.trip_search import _guarded
+from app.utils.provider_health import provider_health, HEALTH_CONSECUTIVE_FAILURES
+
+
+def test_repeated_hangs_open_the_breaker():
+    affiliate = {"provider_name": "hanging-provider", "timeout_seconds": 0.05}
+
+    async def hang(*args):
+        await asyncio.sleep(10)
+
+    async def search(affiliate):
+        return await _guarded(affiliate, hang)()
+
+    async def run():
+        for _ in range(HEALTH_CONSECUTIVE_FAILURES):
+            assert await fan_out("flight", [affiliate], search, policy="sequential") == []
+
+    asyncio.run(run())
+    health = provider_health.get("hanging-provider")
+    assert health.consecutive_failures == HEALTH_CONSECUTIVE_FAILURES
+    assert health.state == "open"
+
+
+def _status_error(status):
+    request = httpx.Request("GET", "https://upstream.test/")
+    return httpx.HTTPStatusError("upstream", request=request, response=httpx.Response(status, request=request))
+
+
+@pytest.mark.parametrize("status, opens", [(400, False), (404, False), (429, True), (503, True)])
+def test_only_upstream_faults_open_the_breaker(status, opens):
+    name = f"status-{status}"
+
+    async def fetch():
+        raise _status_error(status)
+
+    async def run():
+        for _ in range(HEALTH_CONSECUTIVE_FAILURES):
+            with pytest.raises(httpx.HTTPStatusError):
+                await provider_health.call(name, fetch, 1.0)
+
+    asyncio.run(run())
+    assert (provider_health.get(name).state == "open") is opens
+
+
+def test_bad_dates_are_rejected_before_the_breaker(monkeypatch):
+    async def affiliates(kind):
+        return [{"provider_name": "bad-date-provider", "api_key": "test"}]
+
+    monkeypatch.setattr(trip_search, "get_affiliates_by_type_and_priority", affiliates)
+
+    async def run():
+        for _ in range(HEALTH_CONSECUTIVE_FAILURES):
+            with pytest.raises(ValueError):
+                await trip_search.find_flights("TLV", "MXP", "not-a-date")
+            with pytest.raises(ValueError):
+                await trip_search.find_cars({"pickup_iata": "MXP", "date": "11/10/2026"})
+
+    asyncio.run(run())
+    health = provider_health.get("bad-date-provider")
+    assert health.state == "closed"
+    assert not health.snapshot()["samples"]
@@ -0,0 +1,31 @@
+import asyncio
+
+from app.utils import redirect_cache as redirect_cache_module
+from app.utils.redirect_cache import RedirectCache
+from app.utils.write_behind import WRITE_BEHIND_FLUSH_INTERVAL
+
+
+def test_negative_ttl_does_not_outlive_a_write_behind_flush():
+    assert redirect_cache_module.REDIRECT_CACHE_NEGATIVE_TTL <= WRITE_BEHIND_FLUSH_INTERVAL
+
+
+def test_guid_created_elsewhere_resolves_once_its_row_is_written(monkeypatch):
+    monkeypatch.setattr(redirect_cache_module, "REDIRECT_CACHE_NEGATIVE_TTL", 0.05)
+    rows = {}
+
+    async def fetch_row(guid):
+        return rows.get(guid)
+
+    async def increment(guids, deltas):
+        pass
+
+    cache = RedirectCache()
+    cache.register_backend(fetch_row, increment)
+
+    async def run():
+        assert await cache.get("g1") is None   # clicked before the other replica's insert landed
+        rows["g1"] = {"guid": "g1", "original_url": "https://example.com"}
+        await asyncio.sleep(0.06)
+        return await cache.get("g1")
+
+    assert asyncio.run(run())["original_url"] == "https://example.com"
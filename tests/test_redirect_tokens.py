@@ -0,0 +1,34 @@
+import pytest
+
+from app.utils import redirect_tokens
+from app.utils.redirect_tokens import InvalidToken, sign_redirect, verify_redirect
+
+
+@pytest.fixture(autouse=True)
+def secret(monkeypatch):
+    monkeypatch.setattr(redirect_tokens, "REDIRECT_SECRET", "test-secret")
+
+
+def test_round_trip():
+    token = sign_redirect("https://example.com/hotel?id=1", "hotel")
+    assert verify_redirect(token)["u"] == "https://example.com/hotel?id=1"
+
+
+@pytest.mark.parametrize("token", [
+    "no-dot-at-all",
+    "payload.",
+    ".signature",
+    "abc.def",
+    "é.signature",
+    "payload.é",
+    "ü.ß",
+])
+def test_malformed_and_non_ascii_tokens_are_invalid(token):
+    with pytest.raises(InvalidToken):
+        verify_redirect(token)
+
+
+def test_tampered_payload_is_invalid():
+    body, signature = sign_redirect("https://example.com", "flight").split(".")
+    with pytest.raises(InvalidToken):
+        verify_redirect(f"{body}x.{signature}")
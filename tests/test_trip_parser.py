@@ -0,0 +1,67 @@
+from datetime import date
+
+import pytest
+
+from app.utils.trip_parser import parse_trip_message, TRIP_PARSER_MIN_CONFIDENCE
+
+TODAY = date(2026, 10, 17)  # a Saturday
+PREFS = {"home_city": "Tel Aviv"}
+
+
+def parse(message):
+    return parse_trip_message(message, PREFS, TODAY)
+
+
+def fast_path(info):
+    return info["complete"] and info["confidence"] >= TRIP_PARSER_MIN_CONFIDENCE
+
+
+@pytest.mark.parametrize("message, origin, destination, start, end", [
+    ("flight from TLV to MXP on 2026-11-11 back 2026-11-14", "TLV", "MXP", "2026-11-11", "2026-11-14"),
+    ("Flight and hotel from London to Rome on 2026-11-20 until 2026-11-24 please", "London", "Rome", "2026-11-20", "2026-11-24"),
+    ("טיסה מתל אביב לרומא 11.11 עד 15.11 2 מבוגרים", "Tel Aviv", "Rome", "2026-11-11", "2026-11-15"),
+    ("hotel in Milan 1-5 November for two adults", "Tel Aviv", "Milan", "2026-11-01", "2026-11-05"),
+    ("TLV ATH next weekend", "TLV", "ATH", "2026-10-30", "2026-11-01"),
+    ("flights to Paris friday next weekend", "Tel Aviv", "Paris", "2026-10-30", "2026-11-01"),
+    ("flight to Athens may 5 for 4 nights", "Tel Aviv", "Athens", "2027-05-05", "2027-05-09"),
+])
+def test_clear_messages_take_the_fast_path(message, origin, destination, start, end):
+    info = parse(message)
+    assert fast_path(info)
+    assert (info["origin"], info["destination"]) == (origin, destination)
+    assert info["dates"] == {"start": start, "end": end}
+
+
+def test_passengers_and_types():
+    info = parse("flight and car to Rome 2026-11-11, 2 adults and 1 child")
+    assert (info["adults"], info["children"]) == (2, 1)
+    assert info["type"] == ["flight", "car"]
+
+
+@pytest.mark.parametrize("message", [
+    # negations and alternatives
+    "I DO NOT want to go to Rome, cheap flights to Athens 2026-12-01",
+    "hotel in London not Paris, 1-5 November",
+    "flight to Rome 2026-11-11 to 2026-11-14, or maybe Paris instead",
+    "flight to Rome, don't care about the hotel, 2026-11-11",
+    # return before departure
+    "to london on may 5, back may 2",
+    # competing or extra places
+    "from Paris to London and then to Rome on 2026-11-11 back 2026-11-20",
+    "flight to Rome to Athens 2026-11-11",
+    # weekday contradicting the relative dates
+    "next weekend to Rome but leaving thursday",
+    "next weekend but leaving thursday instead",
+])
+def test_ambiguous_messages_go_to_the_llm(message):
+    assert not fast_path(parse(message))
+
+
+def test_past_dates_are_not_trusted():
+    assert not fast_path(parse("flight to Rome 2026-01-05"))
+
+
+def test_missing_destination_is_incomplete():
+    info = parse("flight on 2026-11-11")
+    assert not info["complete"]
+    assert "destination" in info["missing_fields"]
@@ -0,0 +1,72 @@
+import asyncio
+
+from app.utils.write_behind import WriteBehindQueue
+
+
+def test_stop_drains_the_batch_being_written():
+    queue = WriteBehindQueue(batch_size=3, flush_interval=0.01)
+    written = []
+
+    async def slow_sink(target, records):
+        await asyncio.sleep(0.05)
+        written.extend(records)
+
+    queue.register_sink("test", slow_sink)
+
+    async def run():
+        await queue.start()
+        for i in range(8):
+            queue.put("test", "rows", {"n": i})
+        await asyncio.sleep(0.02)  # the loop is now inside a write
+        await queue.stop()
+
+    asyncio.run(run())
+    assert sorted(record["n"] for record in written) == list(range(8))
+    assert queue.snapshot() == {**queue.snapshot(), "flushed": 8, "dropped": 0, "failed": 0, "pending": 0}
+
+
+def test_durable_targets_are_not_dropped_and_failed_writes_are_retried():
+    queue = WriteBehindQueue(max_size=2, batch_size=10, max_retries=2)
+    queue.make_durable("test", "redirects")
+    written, failures = [], [1]
+
+    async def flaky_sink(target, records):
+        if failures:
+            failures.pop()
+            raise RuntimeError("database unavailable")
+        written.extend(records)
+
+    queue.register_sink("test", flaky_sink)
+    for i in range(4):
+        assert queue.put("test", "redirects", {"n": i})
+    assert not queue.put("test", "logs", {"n": 99})  # droppable targets still respect max_size
+
+    async def run():
+        await queue.flush()  # fails, kept for retry
+        assert queue.snapshot()["pending"] == 4
+        await queue.flush()
+
+    asyncio.run(run())
+    assert [record["n"] for record in written] == [0, 1, 2, 3]
+    assert {key: queue.stats[key] for key in ("flushed", "failed", "dropped", "retried")} == {
+        "flushed": 4, "failed": 0, "dropped": 1, "retried": 4
+    }
+
+
+def test_durable_writes_give_up_after_max_retries():
+    queue = WriteBehindQueue(max_retries=2)
+    queue.make_durable("test", "redirects")
+
+    async def broken_sink(target, records):
+        raise RuntimeError("database unavailable")
+
+    queue.register_sink("test", broken_sink)
+    queue.put("test", "redirects", {"n": 1})
+
+    async def run():
+        await queue.start()
+        await queue.stop()
+
+    asyncio.run(run())
+    assert queue.stats["failed"] == 1
+    assert queue.snapshot()["pending"] == 0